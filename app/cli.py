@@ -0,0 +1,78 @@
+import argparse
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlmodel import Session, SQLModel
+from app.database import engine, create_db_and_tables
+from app.crud.analytics import rebuild_doctor_daily_stats
+from app.crud.appointment import index_archived_months
+from app.utils import archive
+from app.utils.media import migrate_flat_images
+from app.jobs import (
+    archive_old_appointments,
+    collect_orphaned_media,
+    sweep_appointment_lifecycle,
+)
+
+
+def rebuild_stats() -> dict:
+    with Session(engine) as session:
+        return {"summary_rows": rebuild_doctor_daily_stats(session)}
+
+
+def index_archive() -> dict:
+    # Backfills the per-user month index for archives written before it existed
+    keys = set()
+    for record in archive.iter_all_records():
+        month = datetime.fromisoformat(record["appointment_date"]).date()
+        for user_id in (record["doctor_id"], record["patient_id"]):
+            keys.add((user_id, month.replace(day=1)))
+    with Session(engine) as session:
+        index_archived_months(session, keys)
+        session.commit()
+    return {"indexed": len(keys)}
+
+
+def migrate_media() -> dict:
+    with Session(engine) as session:
+        return migrate_flat_images(session)
+
+
+def create_indexes() -> dict:
+    # create_all() skips tables that already exist, so indexes added to a
+    # model later have to be created here.
+    inspector = inspect(engine)
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+                created.append(index.name)
+    return {"created": created}
+
+
+COMMANDS = {
+    "rebuild-stats": rebuild_stats,
+    "sweep": sweep_appointment_lifecycle,
+    "archive": archive_old_appointments,
+    "gc-media": collect_orphaned_media,
+    "create-indexes": create_indexes,
+    "index-archive": index_archive,
+    "migrate-media": migrate_media,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance commands")
+    parser.add_argument("command", choices=COMMANDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    create_db_and_tables()
+    print(json.dumps(COMMANDS[args.command]()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+from collections import Counter
+from datetime import date, datetime
+from sqlalchemy import delete, func, insert, text
+from sqlmodel import select, update
+from app.models.analytics import (
+    DailyUtilization,
+    DoctorDailyStats,
+    DoctorUtilization,
+    UtilizationReport,
+)
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import User, UserType
+from app.dependencies import SessionDep
+from app.utils.timeslots import slots_per_day
+from app.utils import archive
+
+COUNTERS = ("booked", "cancelled", "completed")
+
+
+def _counter_for(appointment_status: AppointmentStatus) -> str | None:
+    if appointment_status == AppointmentStatus.cancelled:
+        return "cancelled"
+    if appointment_status == AppointmentStatus.completed:
+        return "completed"
+    return None
+
+
+def _upsert_deltas(session: SessionDep, deltas: dict[tuple[int, date], Counter]):
+    rows = [
+        {"doctor_id": doctor_id, "day": day, **{c: delta[c] for c in COUNTERS}}
+        for (doctor_id, day), delta in deltas.items()
+        if any(delta[c] for c in COUNTERS)
+    ]
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        statement = dialect_insert(DoctorDailyStats).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["doctor_id", "day"],
+            set_={
+                c: getattr(DoctorDailyStats, c) + getattr(statement.excluded, c)
+                for c in COUNTERS
+            },
+        )
+        session.exec(statement)
+        return
+
+    for row in rows:
+        statement = (
+            update(DoctorDailyStats)
+            .where(
+                DoctorDailyStats.doctor_id == row["doctor_id"],
+                DoctorDailyStats.day == row["day"],
+            )
+            .values({c: getattr(DoctorDailyStats, c) + row[c] for c in COUNTERS})
+        )
+        if session.exec(statement).rowcount == 0:
+            session.exec(insert(DoctorDailyStats).values(row))
+
+
+def record_booking(session: SessionDep, appointment: Appointment):
+    # Runs inside the booking transaction, so counters commit with the row.
+    delta = Counter(booked=1)
+    counter = _counter_for(appointment.status)
+    if counter:
+        delta[counter] += 1
+    key = (appointment.doctor_id, appointment.appointment_date.date())
+    _upsert_deltas(session, {key: delta})
+
+
+def record_status_changes(
+    session: SessionDep,
+    rows: list[tuple[int, datetime]],
+    old_status: AppointmentStatus,
+    new_status: AppointmentStatus,
+):
+    old_counter = _counter_for(old_status)
+    new_counter = _counter_for(new_status)
+    if old_counter == new_counter:
+        return
+
+    deltas: dict[tuple[int, date], Counter] = {}
+    for doctor_id, appointment_date in rows:
+        delta = deltas.setdefault((doctor_id, appointment_date.date()), Counter())
+        if old_counter:
+            delta[old_counter] -= 1
+        if new_counter:
+            delta[new_counter] += 1
+    _upsert_deltas(session, deltas)
+
+
+def record_status_change(
+    session: SessionDep,
+    appointment: Appointment,
+    old_status: AppointmentStatus,
+):
+    record_status_changes(
+        session,
+        [(appointment.doctor_id, appointment.appointment_date)],
+        old_status,
+        appointment.status,
+    )
+
+
+def rebuild_doctor_daily_stats(session: SessionDep) -> int:
+    if session.get_bind().dialect.name == "postgresql":
+        # Incremental writers wait until the rebuilt counters are committed,
+        # so no booking is counted twice or lost.
+        session.exec(
+            text(f"LOCK TABLE {DoctorDailyStats.__tablename__} IN EXCLUSIVE MODE")
+        )
+
+    session.exec(delete(DoctorDailyStats))
+    day = func.date(Appointment.appointment_date)
+    summary = select(
+        Appointment.doctor_id,
+        day,
+        func.count(),
+        func.count().filter(Appointment.status == AppointmentStatus.cancelled),
+        func.count().filter(Appointment.status == AppointmentStatus.completed),
+    ).group_by(Appointment.doctor_id, day)
+    session.exec(
+        insert(DoctorDailyStats).from_select(["doctor_id", "day", *COUNTERS], summary)
+    )
+
+    # Archived appointments no longer live in the table but still count.
+    # A crash between writing the archive and deleting the batch leaves a
+    # row in both places; the live row has already been counted above.
+    deltas: dict[tuple[int, date], Counter] = {}
+    seen: set[int] = set()
+    chunk: list[dict] = []
+    for record in archive.iter_all_records():
+        if record["id"] in seen:
+            continue
+        seen.add(record["id"])
+        chunk.append(record)
+        if len(chunk) == 500:
+            _count_archived(session, chunk, deltas)
+            chunk = []
+    _count_archived(session, chunk, deltas)
+    _upsert_deltas(session, deltas)
+
+    session.commit()
+    return session.exec(select(func.count()).select_from(DoctorDailyStats)).one()
+
+
+def _count_archived(
+    session: SessionDep,
+    records: list[dict],
+    deltas: dict[tuple[int, date], Counter],
+):
+    if not records:
+        return
+    live_ids = set(
+        session.exec(
+            select(Appointment.id).where(
+                Appointment.id.in_([record["id"] for record in records])
+            )
+        ).all()
+    )
+    for record in records:
+        if record["id"] in live_ids:
+            continue
+        day = datetime.fromisoformat(record["appointment_date"]).date()
+        delta = deltas.setdefault((record["doctor_id"], day), Counter())
+        delta["booked"] += 1
+        counter = _counter_for(AppointmentStatus(record["status"]))
+        if counter:
+            delta[counter] += 1
+
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def get_utilization_report(
+    session: SessionDep, start: date, end: date
+) -> UtilizationReport:
+    days_in_range = (end - start).days + 1
+    doctors = {
+        doctor_id: (full_name, slots_per_day(available_timeslots))
+        for doctor_id, full_name, available_timeslots in session.exec(
+            select(User.id, User.full_name, User.available_timeslots).where(
+                User.user_type == UserType.doctor
+            )
+        )
+    }
+
+    rows = session.exec(
+        select(DoctorDailyStats).where(
+            DoctorDailyStats.day >= start, DoctorDailyStats.day <= end
+        )
+    ).all()
+
+    per_doctor: dict[int, Counter] = {}
+    per_day: dict[date, Counter] = {}
+    for row in rows:
+        counts = {c: getattr(row, c) for c in COUNTERS}
+        per_doctor.setdefault(row.doctor_id, Counter()).update(counts)
+        per_day.setdefault(row.day, Counter()).update(counts)
+
+    daily_capacity = sum(slots for _, slots in doctors.values())
+
+    def utilization(counts: Counter, capacity: int) -> float | None:
+        if not capacity:
+            return None
+        return _rate(counts["booked"] - counts["cancelled"], capacity)
+
+    doctor_report = []
+    for doctor_id, counts in sorted(per_doctor.items()):
+        full_name, slots = doctors.get(doctor_id, ("", 0))
+        doctor_report.append(
+            DoctorUtilization(
+                doctor_id=doctor_id,
+                full_name=full_name,
+                **{c: counts[c] for c in COUNTERS},
+                cancellation_rate=_rate(counts["cancelled"], counts["booked"]),
+                slot_utilization=utilization(counts, slots * days_in_range),
+            )
+        )
+
+    day_report = [
+        DailyUtilization(
+            day=day,
+            **{c: counts[c] for c in COUNTERS},
+            cancellation_rate=_rate(counts["cancelled"], counts["booked"]),
+            slot_utilization=utilization(counts, daily_capacity),
+        )
+        for day, counts in sorted(per_day.items())
+    ]
+
+    return UtilizationReport(
+        start=start, end=end, doctors=doctor_report, days=day_report
+    )
@@ -1,15 +1,35 @@
-from sqlmodel import select, and_
-from datetime import datetime, timedelta
+from sqlmodel import select, update, delete, and_, or_
+from datetime import date, datetime, timedelta
 from fastapi import HTTPException, status
-from app.models.appointment import Appointment, AppointmentCreate, AppointmentStatus
+from app.models.appointment import (
+    Appointment,
+    ArchivedAppointmentMonth,
+    AppointmentCreate,
+    AppointmentRead,
+    AppointmentStatus,
+    SlotHold,
+    SlotHoldRequest,
+)
 from app.models.user import User, UserType
 from app.dependencies import SessionDep
+from app.crud.analytics import (
+    record_booking,
+    record_status_change,
+    record_status_changes,
+)
+from app.utils.timeslots import SLOT_MINUTES, parse_timeslots
+from app.utils.holds import hold_backend
+from app.utils import archive
+from app.utils.audit import audit_writer
+from app.utils.serialization import APPOINTMENT_COLUMNS
+from app.crud.returning import insert_returning, update_returning
 
 
 def create_appointment(
     session: SessionDep,
     appointment: AppointmentCreate,
     current_user_id: int,
+    hold_id: str | None = None,
 ) -> Appointment:
     # Verify patient_id matches current user (unless admin)
     if current_user_id != appointment.patient_id:
@@ -26,76 +46,202 @@ def create_appointment(
             detail="You cannot book an appointment with yourself",
         )
 
-    doctor = session.get(User, appointment.doctor_id)
+    _validate_slot(
+        session,
+        appointment.doctor_id,
+        appointment.appointment_date,
+        appointment.patient_id,
+    )
+
+    # Instantiating the table model first applies defaults such as created_at
+    values = Appointment(**appointment.model_dump()).model_dump(exclude={"id"})
+    db_appointment = insert_returning(session, Appointment, values)
+
+    # Consumed before commit: a stale or foreign hold aborts the booking
+    if hold_id and not hold_backend.consume(session, hold_id, db_appointment):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Slot hold has expired or does not match this appointment",
+        )
+
+    try:
+        record_booking(session, db_appointment)
+        session.commit()
+    except Exception:
+        if hold_id:
+            hold_backend.restore(session, hold_id)
+        raise
+    return db_appointment
+
+
+def hold_slot(
+    session: SessionDep, hold_request: SlotHoldRequest, patient_id: int
+) -> SlotHold:
+    # Competing holds are left to acquire(), which answers them with a 409
+    _validate_slot(
+        session,
+        hold_request.doctor_id,
+        hold_request.appointment_date,
+        patient_id,
+        check_holds=False,
+    )
+
+    hold = hold_backend.acquire(
+        session, hold_request.doctor_id, patient_id, hold_request.appointment_date
+    )
+    if not hold:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This timeslot is currently held by another patient",
+        )
+    return hold
+
+
+def release_slot_hold(session: SessionDep, hold_id: str, patient_id: int):
+    if not hold_backend.release(session, hold_id, patient_id):
+        raise HTTPException(status_code=404, detail="Slot hold not found")
+
+
+def _validate_slot(
+    session: SessionDep,
+    doctor_id: int,
+    appointment_date: datetime,
+    patient_id: int,
+    check_holds: bool = True,
+):
+    doctor = session.get(User, doctor_id)
     if not doctor or doctor.user_type != UserType.doctor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Doctor not found"
         )
 
-    if not is_doctor_available(
-        session, appointment.doctor_id, appointment.appointment_date
-    ):
+    # Reuses the doctor row instead of loading it again
+    if not is_within_timeslots(doctor, appointment_date):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Doctor is not available at this timeslot",
         )
 
     if has_overlapping_appointment(
-        session, appointment.doctor_id, appointment.appointment_date
+        session, doctor_id, appointment_date, patient_id, check_holds
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This timeslot is already booked",
         )
 
-    db_appointment = Appointment(**appointment.model_dump())
-    session.add(db_appointment)
-    session.commit()
-    session.refresh(db_appointment)
-    return db_appointment
-
 
-def is_doctor_available(
-    session: SessionDep, doctor_id: int, appointment_time: datetime
-) -> bool:
-    doctor = session.get(User, doctor_id)
-    if not doctor or not doctor.available_timeslots:
+def is_within_timeslots(doctor: User, appointment_time: datetime) -> bool:
+    if not doctor.available_timeslots:
         return False
 
-    start_str, end_str = doctor.available_timeslots.split("-")
-    start_hour = int(start_str.split(":")[0])
-    end_hour = int(end_str.split(":")[0])
+    start_hour, end_hour = parse_timeslots(doctor.available_timeslots)
 
     return start_hour <= appointment_time.hour < end_hour
 
 
 def has_overlapping_appointment(
-    session: SessionDep, doctor_id: int, appointment_time: datetime
+    session: SessionDep,
+    doctor_id: int,
+    appointment_time: datetime,
+    patient_id: int | None = None,
+    check_holds: bool = True,
 ) -> bool:
-    start_window = appointment_time - timedelta(minutes=30)
-    end_window = appointment_time + timedelta(minutes=30)
+    # Active slot holds count as bookings, except those held by patient_id
+    start_window = appointment_time - timedelta(minutes=SLOT_MINUTES)
+    end_window = appointment_time + timedelta(minutes=SLOT_MINUTES)
 
-    statement = select(Appointment).where(
-        and_(
-            Appointment.doctor_id == doctor_id,
-            Appointment.appointment_date >= start_window,
-            Appointment.appointment_date <= end_window,
-            Appointment.status != AppointmentStatus.cancelled,
+    statement = (
+        select(Appointment.id)
+        .where(
+            and_(
+                Appointment.doctor_id == doctor_id,
+                Appointment.appointment_date >= start_window,
+                Appointment.appointment_date <= end_window,
+                Appointment.status != AppointmentStatus.cancelled,
+            )
         )
+        .limit(1)
     )
-    return session.exec(statement).first() is not None
+    if session.exec(statement).first() is not None:
+        return True
+    if not check_holds:
+        return False
+    return hold_backend.is_held(session, doctor_id, appointment_time, patient_id)
 
 
-def get_appointments_for_user(session: SessionDep, user_id: int, user_type: UserType):
+def get_appointments_for_user(
+    session: SessionDep,
+    user_id: int,
+    user_type: UserType,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[dict]:
+    # Plain column rows instead of ORM objects: list endpoints serialize
+    # them straight to JSON (see app.utils.serialization).
+    statement = select(*APPOINTMENT_COLUMNS)
     if user_type == UserType.doctor:
-        statement = select(Appointment).where(Appointment.doctor_id == user_id)
+        statement = statement.where(Appointment.doctor_id == user_id)
     else:
-        statement = select(Appointment).where(Appointment.patient_id == user_id)
+        statement = statement.where(Appointment.patient_id == user_id)
+
+    if start:
+        statement = statement.where(Appointment.appointment_date >= start)
+    if end:
+        statement = statement.where(Appointment.appointment_date <= end)
+
+    appointments = [dict(row) for row in session.exec(statement).mappings()]
+
+    # Only ranges reaching back past the archive horizon touch archived files;
+    # a missing start means the whole history, archive included.
+    if start is None or start < archive.archive_cutoff():
+        live_ids = {a["id"] for a in appointments}
+        archived = get_archived_appointments_for_user(
+            session, user_id, user_type, start, end or datetime.now()
+        )
+        appointments = [a for a in archived if a["id"] not in live_ids] + appointments
 
-    appointments = session.exec(statement).all()
     return appointments
 
 
+def get_archived_appointments_for_user(
+    session: SessionDep,
+    user_id: int,
+    user_type: UserType,
+    start: datetime | None,
+    end: datetime,
+) -> list[dict]:
+    # Only archive months known to hold this user's appointments are read
+    statement = select(ArchivedAppointmentMonth.month).where(
+        ArchivedAppointmentMonth.user_id == user_id,
+        ArchivedAppointmentMonth.month <= end.date(),
+    )
+    if start:
+        statement = statement.where(
+            ArchivedAppointmentMonth.month >= start.date().replace(day=1)
+        )
+    months = session.exec(statement).all()
+    if not months:
+        return []
+
+    key = "doctor_id" if user_type == UserType.doctor else "patient_id"
+
+    def matches(record: dict) -> bool:
+        if record[key] != user_id:
+            return False
+        appointment_date = datetime.fromisoformat(record["appointment_date"])
+        return (start is None or start <= appointment_date) and appointment_date <= end
+
+    # An interrupted archival run can leave a row in more than one batch.
+    # Records were written from AppointmentRead, so they are already in
+    # response shape.
+    records = {record["id"]: record for record in archive.read_months(months, matches)}
+    return list(records.values())
+
+
+OPEN_STATUSES = (AppointmentStatus.pending, AppointmentStatus.confirmed)
+
+
 def update_appointment_status(
     session: SessionDep,
     appointment_id: int,
@@ -103,35 +249,234 @@ def update_appointment_status(
     current_user_id: int,
     current_user_type: UserType,
 ):
-    appointment = session.get(Appointment, appointment_id)
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    # Patients can only cancel appointments
+    if (
+        current_user_type == UserType.patient
+        and new_status != AppointmentStatus.cancelled
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Patients can only cancel appointments",
+        )
 
-    # Patients can only cancel their own appointments
+    # Ownership is enforced by the UPDATE itself: patients and doctors only
+    # match their own appointments.
+    conditions = [Appointment.id == appointment_id]
     if current_user_type == UserType.patient:
-        if appointment.patient_id != current_user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this appointment",
-            )
-        if new_status != AppointmentStatus.cancelled:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Patients can only cancel appointments",
-            )
+        conditions.append(Appointment.patient_id == current_user_id)
+    elif current_user_type == UserType.doctor:
+        conditions.append(Appointment.doctor_id == current_user_id)
 
-    # Doctors can only update their own appointments
-    if (
-        current_user_type == UserType.doctor
-        and appointment.doctor_id != current_user_id
-    ):
+    # Fast path for open appointments: the summary counts pending and
+    # confirmed the same way, so their exact old status is not needed.
+    appointment = update_returning(
+        session,
+        Appointment,
+        [*conditions, Appointment.status.in_(OPEN_STATUSES)],
+        {"status": new_status},
+    )
+    old_status = AppointmentStatus.pending
+    if not appointment:
+        appointment, old_status = _update_closed_appointment(
+            session, appointment_id, new_status, current_user_id, current_user_type
+        )
+
+    record_status_change(session, appointment, old_status)
+    session.commit()
+    audit_writer.record(
+        "appointment.status_changed",
+        "appointment",
+        appointment.id,
+        actor_id=current_user_id,
+        changes={"status": new_status.value},
+    )
+    return appointment
+
+
+def _update_closed_appointment(
+    session: SessionDep,
+    appointment_id: int,
+    new_status: AppointmentStatus,
+    current_user_id: int,
+    current_user_type: UserType,
+) -> tuple[Appointment, AppointmentStatus]:
+    # Only reached when the fast path matched nothing: the appointment is
+    # missing, someone else's, or already cancelled/completed.
+    appointment = session.exec(
+        select(Appointment).where(Appointment.id == appointment_id).with_for_update()
+    ).first()
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+
+    owner_id = {
+        UserType.patient: appointment.patient_id,
+        UserType.doctor: appointment.doctor_id,
+    }.get(current_user_type, current_user_id)
+    if owner_id != current_user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this appointment",
         )
 
+    old_status = appointment.status
     appointment.status = new_status
     session.add(appointment)
-    session.commit()
-    session.refresh(appointment)
-    return appointment
+    session.flush()
+    return appointment, old_status
+
+
+def _sweep_status(
+    session: SessionDep,
+    condition,
+    old_status: AppointmentStatus,
+    new_status: AppointmentStatus,
+    batch_size: int,
+) -> int:
+    # Set-based UPDATE over bounded id batches so each transaction stays short
+    # and concurrent writers are never blocked for the whole sweep.
+    total = 0
+    while True:
+        batch = session.exec(
+            select(Appointment.id, Appointment.doctor_id, Appointment.appointment_date)
+            .where(condition, Appointment.status == old_status)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not batch:
+            return total
+
+        statement = (
+            update(Appointment)
+            .where(Appointment.id.in_([row[0] for row in batch]))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        session.exec(statement)
+        record_status_changes(
+            session, [row[1:] for row in batch], old_status, new_status
+        )
+        session.commit()
+        # System changes have no actor
+        for row in batch:
+            audit_writer.record(
+                "appointment.status_changed",
+                "appointment",
+                row[0],
+                changes={"status": new_status.value},
+            )
+        total += len(batch)
+        if len(batch) < batch_size:
+            return total
+
+
+def complete_past_appointments(
+    session: SessionDep, now: datetime, batch_size: int = 1000
+) -> int:
+    return _sweep_status(
+        session,
+        Appointment.appointment_date < now,
+        AppointmentStatus.confirmed,
+        AppointmentStatus.completed,
+        batch_size,
+    )
+
+
+def expire_pending_appointments(
+    session: SessionDep, now: datetime, ttl: timedelta, batch_size: int = 1000
+) -> int:
+    # Pending requests expire once they sit unconfirmed past the TTL or once
+    # the requested time itself has passed.
+    condition = or_(
+        Appointment.created_at < now - ttl,
+        Appointment.appointment_date < now,
+    )
+    return _sweep_status(
+        session,
+        condition,
+        AppointmentStatus.pending,
+        AppointmentStatus.cancelled,
+        batch_size,
+    )
+
+
+def archive_appointments(
+    session: SessionDep, cutoff: datetime, batch_size: int = 1000
+) -> int:
+    # Rows are written (and fsynced) to the archive before they are deleted,
+    # so a crash in between only duplicates a batch; readers de-duplicate.
+    total = 0
+    while True:
+        batch = session.exec(
+            select(Appointment)
+            .where(
+                Appointment.appointment_date < cutoff,
+                Appointment.status.in_(
+                    [AppointmentStatus.cancelled, AppointmentStatus.completed]
+                ),
+            )
+            .order_by(Appointment.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not batch:
+            return total
+
+        archive.append_records(
+            [AppointmentRead.model_validate(a).model_dump(mode="json") for a in batch]
+        )
+        index_archived_months(
+            session,
+            {
+                (user_id, a.appointment_date.date().replace(day=1))
+                for a in batch
+                for user_id in (a.doctor_id, a.patient_id)
+            },
+        )
+        session.exec(
+            delete(Appointment)
+            .where(Appointment.id.in_([a.id for a in batch]))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        session.expunge_all()
+        total += len(batch)
+        if len(batch) < batch_size:
+            return total
+
+
+def index_archived_months(session: SessionDep, keys: set[tuple[int, date]]):
+    # (user_id, first day of month) pairs; already indexed pairs are skipped
+    keys = list(keys)
+    dialect = session.get_bind().dialect.name
+    for i in range(0, len(keys), 500):
+        chunk = keys[i : i + 500]
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            rows = [{"user_id": user_id, "month": month} for user_id, month in chunk]
+            session.exec(
+                dialect_insert(ArchivedAppointmentMonth)
+                .values(rows)
+                .on_conflict_do_nothing()
+            )
+            continue
+
+        existing = {
+            tuple(row)
+            for row in session.exec(
+                select(
+                    ArchivedAppointmentMonth.user_id, ArchivedAppointmentMonth.month
+                ).where(
+                    ArchivedAppointmentMonth.user_id.in_(
+                        {user_id for user_id, _ in chunk}
+                    )
+                )
+            )
+        }
+        for user_id, month in chunk:
+            if (user_id, month) not in existing:
+                session.add(ArchivedAppointmentMonth(user_id=user_id, month=month))
+        session.flush()
@@ -0,0 +1,41 @@
+from sqlmodel import SQLModel, select, insert, update
+from app.dependencies import SessionDep
+
+# Write helpers that hand back the persisted row from the INSERT/UPDATE
+# statement itself, so callers never need a refresh() SELECT afterwards.
+# Databases without RETURNING (SQLite < 3.35) take the ORM fallback.
+
+
+def insert_returning(session: SessionDep, model: type[SQLModel], values: dict):
+    if session.get_bind().dialect.insert_returning:
+        statement = insert(model).values(values).returning(model)
+        return session.exec(statement).scalar_one()
+
+    db_obj = model(**values)
+    session.add(db_obj)
+    session.flush()
+    return db_obj
+
+
+def update_returning(
+    session: SessionDep, model: type[SQLModel], conditions: list, values: dict
+):
+    # Conditions go into the WHERE clause, so permission and state checks
+    # cost nothing extra; None means no row matched them.
+    if session.get_bind().dialect.update_returning:
+        statement = (
+            update(model)
+            .where(*conditions)
+            .values(values)
+            .returning(model)
+            .execution_options(populate_existing=True)
+        )
+        return session.exec(statement).scalar_one_or_none()
+
+    db_obj = session.exec(select(model).where(*conditions).with_for_update()).first()
+    if db_obj is not None:
+        for key, value in values.items():
+            setattr(db_obj, key, value)
+        session.add(db_obj)
+        session.flush()
+    return db_obj
@@ -1,8 +1,31 @@
-from sqlmodel import select
-from app.models.user import User, UserCreate, UserRead, UserUpdate, UserType
-from app.utils.auth import get_password_hash
+from itertools import islice
+from typing import Iterable
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, or_
+from app.models.user import (
+    User,
+    UserCreate,
+    UserRead,
+    UserUpdate,
+    UserType,
+    BulkImportReport,
+    BulkImportRowError,
+)
+from app.utils.auth import get_password_hash, get_password_hashes
 from app.dependencies import SessionDep
+from app.crud.returning import insert_returning, update_returning
+from app.utils.audit import audit_writer
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+
+DOCTOR_REQUIRED_FIELDS = (
+    "license_number",
+    "experience_years",
+    "consultation_fee",
+    "available_timeslots",
+)
 
 
 def get_user_by_email(session: SessionDep, email: str) -> UserRead:
@@ -15,14 +38,20 @@ def get_user_by_mobile(session: SessionDep, mobile: str) -> UserRead:
     return session.exec(statement).first()
 
 
+def missing_doctor_fields(user: UserCreate) -> list[str]:
+    if user.user_type != UserType.doctor:
+        return []
+    return [field for field in DOCTOR_REQUIRED_FIELDS if getattr(user, field) is None]
+
+
 def create_user(session: SessionDep, user: UserCreate) -> UserRead:
     hashed_password = get_password_hash(user.password)
-    db_user = User(
-        **user.model_dump(exclude={"password"}), hashed_password=hashed_password
+    db_user = insert_returning(
+        session,
+        User,
+        {**user.model_dump(exclude={"password"}), "hashed_password": hashed_password},
     )
-    session.add(db_user)
     session.commit()
-    session.refresh(db_user)
     return db_user
 
 
@@ -30,10 +59,6 @@ def update_user(
     session: SessionDep, user_id: int, user_update: UserUpdate, current_user: User
 ) -> UserRead:
 
-    db_user = session.get(User, user_id)
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Check permissions (admin can update anyone, users can only update themselves)
     if current_user.user_type != UserType.admin and current_user.id != user_id:
         raise HTTPException(
@@ -41,23 +66,173 @@ def update_user(
             detail="You can only update your own profile",
         )
 
-    # Check if new email or mobile already exists
-    if user_update.email and user_update.email != db_user.email:
-        if get_user_by_email(session, user_update.email):
+    # Check if new email or mobile already belongs to someone else. The same
+    # query fetches the user's own row, so a missing user is still a 404.
+    conflicts = []
+    if user_update.email:
+        conflicts.append(User.email == user_update.email)
+    if user_update.mobile:
+        conflicts.append(User.mobile == user_update.mobile)
+    if conflicts:
+        rows = session.exec(
+            select(User.id, User.email, User.mobile).where(
+                or_(User.id == user_id, *conflicts)
+            )
+        ).all()
+        if not any(row_id == user_id for row_id, _, _ in rows):
+            raise HTTPException(status_code=404, detail="User not found")
+        taken = [(email, mobile) for row_id, email, mobile in rows if row_id != user_id]
+        if any(email == user_update.email for email, _ in taken):
             raise HTTPException(status_code=400, detail="Email already registered")
-
-    if user_update.mobile and user_update.mobile != db_user.mobile:
-        if get_user_by_mobile(session, user_update.mobile):
+        if any(mobile == user_update.mobile for _, mobile in taken):
             raise HTTPException(
                 status_code=400, detail="Mobile number already registered"
             )
 
     # Update fields
     update_data = user_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
+    if update_data:
+        db_user = update_returning(session, User, [User.id == user_id], update_data)
+    else:
+        db_user = session.get(User, user_id)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    session.add(db_user)
     session.commit()
-    session.refresh(db_user)
+    if update_data:
+        audit_writer.record(
+            "user.updated",
+            "user",
+            user_id,
+            actor_id=current_user.id,
+            changes=jsonable_encoder(update_data),
+        )
     return db_user
+
+
+def _validate_import_row(row: dict) -> tuple[UserCreate | None, list[str]]:
+    if not isinstance(row, dict):
+        return None, ["Row is not a valid JSON object"]
+    # csv.DictReader files surplus cells under the key None
+    if None in row:
+        return None, ["Row has more values than the header"]
+    # Empty CSV cells mean "not provided"
+    data = {key: (value if value != "" else None) for key, value in row.items()}
+    data.pop("profile_image", None)
+    try:
+        user = UserCreate(**data)
+    except ValidationError as exc:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors()
+        ]
+
+    if user.user_type == UserType.admin:
+        return None, ["Bulk import only creates doctor and patient accounts"]
+    missing = missing_doctor_fields(user)
+    if missing:
+        return None, [f"{field} is required for doctors" for field in missing]
+    return user, []
+
+
+def _insert_users(session: SessionDep, rows: list[tuple[int, dict]]) -> list[int]:
+    # One multi-row INSERT for the batch; a concurrent registration that won a
+    # unique key race sends the batch through per-row savepoints instead.
+    try:
+        session.exec(insert(User), params=[values for _, values in rows])
+        session.commit()
+        return []
+    except IntegrityError:
+        session.rollback()
+
+    failed = []
+    for row_number, values in rows:
+        try:
+            with session.begin_nested():
+                session.exec(insert(User), params=[values])
+        except IntegrityError:
+            failed.append(row_number)
+    session.commit()
+    return failed
+
+
+def bulk_create_users(
+    session: SessionDep, rows: Iterable[tuple[int, dict]], batch_size: int = 500
+) -> BulkImportReport:
+    report = BulkImportReport(total=0, created=0, errors=[])
+    seen_emails: set[str] = set()
+    seen_mobiles: set[str] = set()
+    rows = iter(rows)
+
+    while batch := list(islice(rows, batch_size)):
+        report.total += len(batch)
+        valid: list[tuple[int, UserCreate]] = []
+        for row_number, row in batch:
+            user, errors = _validate_import_row(row)
+            if errors:
+                email = row.get("email") if isinstance(row, dict) else None
+                report.errors.append(
+                    BulkImportRowError(
+                        row=row_number,
+                        email=email if isinstance(email, str) else None,
+                        errors=errors,
+                    )
+                )
+            else:
+                valid.append((row_number, user))
+
+        # One uniqueness lookup for the whole batch
+        emails = [user.email for _, user in valid]
+        mobiles = [user.mobile for _, user in valid]
+        existing = session.exec(
+            select(User.email, User.mobile).where(
+                or_(User.email.in_(emails), User.mobile.in_(mobiles))
+            )
+        ).all()
+        seen_emails.update(email for email, _ in existing)
+        seen_mobiles.update(mobile for _, mobile in existing)
+
+        accepted: list[tuple[int, UserCreate]] = []
+        for row_number, user in valid:
+            errors = []
+            if user.email in seen_emails:
+                errors.append("Email already registered")
+            if user.mobile in seen_mobiles:
+                errors.append("Mobile number already registered")
+            if errors:
+                report.errors.append(
+                    BulkImportRowError(row=row_number, email=user.email, errors=errors)
+                )
+                continue
+            seen_emails.add(user.email)
+            seen_mobiles.add(user.mobile)
+            accepted.append((row_number, user))
+
+        if not accepted:
+            continue
+
+        hashes = get_password_hashes([user.password for _, user in accepted])
+        values = [
+            (
+                row_number,
+                {
+                    **user.model_dump(exclude={"password"}),
+                    "hashed_password": hashed_password,
+                },
+            )
+            for (row_number, user), hashed_password in zip(accepted, hashes)
+        ]
+        failed = _insert_users(session, values)
+        emails_by_row = {row_number: row["email"] for row_number, row in values}
+        for row_number in failed:
+            report.errors.append(
+                BulkImportRowError(
+                    row=row_number,
+                    email=emails_by_row[row_number],
+                    errors=["Email or mobile number already registered"],
+                )
+            )
+        report.created += len(values) - len(failed)
+
+    report.errors.sort(key=lambda error: error.row)
+    return report
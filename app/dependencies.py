@@ -13,7 +13,8 @@ oauth_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
 
 def get_session():
-    with Session(engine) as session:
+    # Rows returned by INSERT/UPDATE ... RETURNING stay loaded after commit
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
 
@@ -133,7 +134,7 @@ def user_update_dep(
     consultation_fee: Annotated[float | None, Form()] = None,
     available_timeslots: Annotated[str | None, Form()] = None,
 ) -> UserUpdateForm:
-    return UserUpdateForm(
+    fields = dict(
         full_name=full_name,
         email=email,
         mobile=mobile,
@@ -146,6 +147,8 @@ def user_update_dep(
         consultation_fee=consultation_fee,
         available_timeslots=available_timeslots,
     )
+    # Only submitted fields count as set, so exclude_unset skips the rest
+    return UserUpdateForm(**{k: v for k, v in fields.items() if v is not None})
 
 
 userUpdateDP = Annotated[UserUpdateForm, Depends(user_update_dep)]
@@ -0,0 +1,79 @@
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlmodel import Session
+from app.database import engine
+from app.crud.appointment import (
+    archive_appointments,
+    complete_past_appointments,
+    expire_pending_appointments,
+)
+from app.utils.archive import archive_cutoff
+from app.utils.media import collect_orphaned_images
+from app.utils.holds import hold_backend
+from app.utils.scheduler import Scheduler
+
+load_dotenv()
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+LIFECYCLE_SWEEP_INTERVAL_SECONDS = int(
+    os.getenv("LIFECYCLE_SWEEP_INTERVAL_SECONDS", "300")
+)
+PENDING_APPOINTMENT_TTL_HOURS = int(os.getenv("PENDING_APPOINTMENT_TTL_HOURS", "24"))
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "1000"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "86400"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+MEDIA_GC_INTERVAL_SECONDS = int(os.getenv("MEDIA_GC_INTERVAL_SECONDS", "86400"))
+MEDIA_GC_GRACE_HOURS = int(os.getenv("MEDIA_GC_GRACE_HOURS", "24"))
+MEDIA_GC_BATCH_SIZE = int(os.getenv("MEDIA_GC_BATCH_SIZE", "1000"))
+SLOT_HOLD_PURGE_INTERVAL_SECONDS = int(
+    os.getenv("SLOT_HOLD_PURGE_INTERVAL_SECONDS", "60")
+)
+
+
+def sweep_appointment_lifecycle() -> dict:
+    now = datetime.now()
+    with Session(engine) as session:
+        completed = complete_past_appointments(session, now, SWEEP_BATCH_SIZE)
+        expired = expire_pending_appointments(
+            session,
+            now,
+            timedelta(hours=PENDING_APPOINTMENT_TTL_HOURS),
+            SWEEP_BATCH_SIZE,
+        )
+    return {"completed": completed, "expired": expired}
+
+
+def archive_old_appointments() -> dict:
+    with Session(engine) as session:
+        archived = archive_appointments(session, archive_cutoff(), ARCHIVE_BATCH_SIZE)
+    return {"archived": archived}
+
+
+def collect_orphaned_media() -> dict:
+    with Session(engine) as session:
+        return collect_orphaned_images(
+            session, MEDIA_GC_GRACE_HOURS * 3600, MEDIA_GC_BATCH_SIZE
+        )
+
+
+def purge_expired_slot_holds() -> dict:
+    with Session(engine) as session:
+        return {"purged": hold_backend.purge_expired(session)}
+
+
+def create_scheduler() -> Scheduler:
+    scheduler = Scheduler(engine)
+    scheduler.add_job(
+        "appointment_lifecycle",
+        sweep_appointment_lifecycle,
+        LIFECYCLE_SWEEP_INTERVAL_SECONDS,
+    )
+    scheduler.add_job(
+        "appointment_archive", archive_old_appointments, ARCHIVE_INTERVAL_SECONDS
+    )
+    scheduler.add_job("media_gc", collect_orphaned_media, MEDIA_GC_INTERVAL_SECONDS)
+    scheduler.add_job(
+        "slot_hold_purge", purge_expired_slot_holds, SLOT_HOLD_PURGE_INTERVAL_SECONDS
+    )
+    return scheduler
@@ -1,14 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from app.database import create_db_and_tables
-from app.routers import users, appointment
+from app.jobs import SCHEDULER_ENABLED, create_scheduler
+from app.routers import users, appointment, analytics
+from app.utils.audit import audit_writer
+from app.utils.auth import shutdown_hash_pool
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI()
 
-
-@app.on_event("startup")
-def on_startup():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     create_db_and_tables()
+    audit_writer.start()
+    scheduler = create_scheduler()
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    yield
+    # Joining threads and processes blocks, so keep it off the event loop
+    await run_in_threadpool(_shutdown, scheduler)
+
+
+def _shutdown(scheduler):
+    scheduler.stop()
+    # Flushes every queued audit event before the process exits
+    audit_writer.stop()
+    shutdown_hash_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.mount("/media", StaticFiles(directory="media"), name="media")
@@ -17,3 +37,4 @@ app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(
     appointment.router, prefix="/api/appointments", tags=["appointments"]
 )
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
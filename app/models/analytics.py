@@ -0,0 +1,38 @@
+from datetime import date
+from sqlmodel import SQLModel, Field
+
+
+class DoctorDailyStats(SQLModel, table=True):
+    """Booking counters per doctor and appointment day, kept up to date on writes"""
+
+    doctor_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    booked: int = 0
+    cancelled: int = 0
+    completed: int = 0
+
+
+class DoctorUtilization(SQLModel):
+    doctor_id: int
+    full_name: str
+    booked: int
+    cancelled: int
+    completed: int
+    cancellation_rate: float
+    slot_utilization: float | None
+
+
+class DailyUtilization(SQLModel):
+    day: date
+    booked: int
+    cancelled: int
+    completed: int
+    cancellation_rate: float
+    slot_utilization: float | None
+
+
+class UtilizationReport(SQLModel):
+    start: date
+    end: date
+    doctors: list[DoctorUtilization]
+    days: list[DailyUtilization]
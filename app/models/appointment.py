@@ -1,7 +1,8 @@
 from __future__ import annotations
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import field_validator
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional
 
@@ -22,16 +23,23 @@ class AppointmentBase(SQLModel):
 
 
 class Appointment(AppointmentBase, table=True):
+    # Every hot query filters on one participant and a date range. Ids are
+    # never reused on SQLite either, so an archived appointment keeps its id.
+    __table_args__ = (
+        Index("ix_appointment_doctor_id_date", "doctor_id", "appointment_date"),
+        Index("ix_appointment_patient_id_date", "patient_id", "appointment_date"),
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.now)
 
 
-class AppointmentBookRequest(SQLModel):
-    """Model for patient booking requests"""
+class SlotHoldRequest(SQLModel):
+    """Model for reserving a doctor's timeslot before booking"""
 
     doctor_id: int
     appointment_date: datetime
-    notes: Optional[str] = None
 
     @field_validator("appointment_date")
     def validate_appointment_date(cls, v):
@@ -42,6 +50,13 @@ class AppointmentBookRequest(SQLModel):
         return v
 
 
+class AppointmentBookRequest(SlotHoldRequest):
+    """Model for patient booking requests"""
+
+    notes: Optional[str] = None
+    hold_id: Optional[str] = None
+
+
 class AppointmentCreate(AppointmentBase):
     """For admin/doctor creating appointments"""
 
@@ -51,3 +66,27 @@ class AppointmentCreate(AppointmentBase):
 class AppointmentRead(AppointmentBase):
     id: int
     created_at: datetime
+
+
+class SlotHold(SQLModel, table=True):
+    """Short-lived reservation of a doctor's timeslot for one patient"""
+
+    id: str = Field(primary_key=True)
+    doctor_id: int = Field(foreign_key="user.id", index=True)
+    patient_id: int = Field(foreign_key="user.id")
+    appointment_date: datetime
+    expires_at: datetime = Field(index=True)
+
+
+class SlotHoldRead(SQLModel):
+    id: str
+    doctor_id: int
+    appointment_date: datetime
+    expires_at: datetime
+
+
+class ArchivedAppointmentMonth(SQLModel, table=True):
+    """Archive months holding appointments of a doctor or patient"""
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True)
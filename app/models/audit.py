@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any
+from sqlalchemy import JSON, Column
+from sqlmodel import SQLModel, Field
+
+
+class AuditLog(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    actor_id: int | None = Field(default=None, index=True)
+    action: str
+    entity_type: str = Field(index=True)
+    entity_id: int = Field(index=True)
+    changes: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class AuditQueueStats(SQLModel):
+    sink: str
+    queue_depth: int
+    queue_capacity: int
+    enqueued: int
+    flushed: int
+    overflowed: int
+    dropped: int
+    failed_flushes: int
+    last_flush_size: int
+    last_flush_latency_ms: float
+    max_flush_latency_ms: float
@@ -73,6 +73,7 @@ class UserUpdateBase(SQLModel):
     division: str | None = None
     district: str | None = None
     thana: str | None = None
+    profile_image: str | None = None
     is_active: bool | None = None
     license_number: str | None = None
     experience_years: int | None = None
@@ -108,3 +109,15 @@ class PasswordChangeForm(SQLModel):
         if not any(c in "!@#$%^&*()_+" for c in val):
             raise ValueError("Password must contain at least one special character")
         return val
+
+
+class BulkImportRowError(BaseModel):
+    row: int
+    email: str | None = None
+    errors: list[str]
+
+
+class BulkImportReport(BaseModel):
+    total: int
+    created: int
+    errors: list[BulkImportRowError]
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+from datetime import date, timedelta
+from app.models.analytics import UtilizationReport
+from app.models.audit import AuditQueueStats
+from app.models.user import UserRead
+from app.crud.analytics import get_utilization_report
+from app.dependencies import SessionDep, get_current_admin
+from app.utils.audit import audit_writer
+
+router = APIRouter()
+
+DEFAULT_REPORT_DAYS = 30
+
+
+@router.get("/utilization", response_model=UtilizationReport)
+def utilization(
+    session: SessionDep,
+    admin_user: Annotated[UserRead, Depends(get_current_admin)],
+    start: date | None = None,
+    end: date | None = None,
+):
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    return get_utilization_report(session, start, end)
+
+
+@router.get("/audit-queue", response_model=AuditQueueStats)
+def audit_queue(admin_user: Annotated[UserRead, Depends(get_current_admin)]):
+    return audit_writer.stats()
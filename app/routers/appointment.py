@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response
 from typing import List, Annotated
 from datetime import datetime
 from app.models.appointment import (
@@ -6,16 +6,21 @@ from app.models.appointment import (
     AppointmentCreate,
     AppointmentRead,
     AppointmentStatus,
+    SlotHoldRead,
+    SlotHoldRequest,
 )
 from app.models.user import UserType, UserRead
 from app.crud.appointment import (
     create_appointment,
     get_appointments_for_user,
     update_appointment_status,
-    is_doctor_available,
+    is_within_timeslots,
     has_overlapping_appointment,
+    hold_slot,
+    release_slot_hold,
 )
-from app.dependencies import SessionDep, get_current_user
+from app.dependencies import SessionDep, get_current_user, get_current_patient
+from app.utils.serialization import appointment_list_response, appointment_response
 from app.models.user import User
 
 router = APIRouter()
@@ -34,20 +39,52 @@ def book_appointment(
         )
 
     appointment_data = AppointmentCreate(
-        **book_request.model_dump(),
+        **book_request.model_dump(exclude={"hold_id"}),
         patient_id=current_user.id,
         status=AppointmentStatus.pending
     )
 
-    return create_appointment(session, appointment_data, current_user.id)
+    return appointment_response(
+        create_appointment(
+            session, appointment_data, current_user.id, book_request.hold_id
+        )
+    )
+
+
+@router.post("/holds", response_model=SlotHoldRead)
+def create_slot_hold(
+    hold_request: SlotHoldRequest,
+    session: SessionDep,
+    current_user: Annotated[UserRead, Depends(get_current_patient)],
+):
+    return hold_slot(session, hold_request, current_user.id)
+
+
+@router.delete("/holds/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_slot_hold(
+    hold_id: str,
+    session: SessionDep,
+    current_user: Annotated[UserRead, Depends(get_current_patient)],
+):
+    release_slot_hold(session, hold_id, current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/my-appointments", response_model=List[AppointmentRead])
 def get_my_appointments(
     session: SessionDep,
     current_user: Annotated[UserRead, Depends(get_current_user)],
+    start: datetime | None = None,
+    end: datetime | None = None,
 ):
-    return get_appointments_for_user(session, current_user.id, current_user.user_type)
+    # Stored times are naive, like the booking validator produces
+    start = start.replace(tzinfo=None) if start else None
+    end = end.replace(tzinfo=None) if end else None
+    return appointment_list_response(
+        get_appointments_for_user(
+            session, current_user.id, current_user.user_type, start, end
+        )
+    )
 
 
 @router.patch("/{appointment_id}/status", response_model=AppointmentRead)
@@ -57,8 +94,10 @@ def update_status(
     session: SessionDep,
     current_user: Annotated[UserRead, Depends(get_current_user)],
 ):
-    return update_appointment_status(
-        session, appointment_id, new_status, current_user.id, current_user.user_type
+    return appointment_response(
+        update_appointment_status(
+            session, appointment_id, new_status, current_user.id, current_user.user_type
+        )
     )
 
 
@@ -72,7 +111,7 @@ def check_doctor_availability(
     if not doctor or doctor.user_type != UserType.doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
-    is_available = is_doctor_available(session, doctor_id, date)
+    is_available = is_within_timeslots(doctor, date)
     is_booked = has_overlapping_appointment(session, doctor_id, date)
 
     return {
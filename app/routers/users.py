@@ -1,9 +1,14 @@
-import os
-import uuid
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, File, UploadFile
 from typing import Annotated
 from fastapi.security import OAuth2PasswordRequestForm
-from app.models.user import UserRead, UserType, UserCreate, UserUpdate
+from app.models.user import (
+    User,
+    UserRead,
+    UserCreate,
+    UserUpdate,
+    UserUpdateForm,
+    BulkImportReport,
+)
 from app.utils.auth import get_password_hash
 from app.crud.user import update_user
 from app.dependencies import (
@@ -19,14 +24,18 @@ from app.models.token import Token
 
 from app.utils.auth import create_access_token, verify_password
 from app.crud.user import (
+    bulk_create_users,
     create_user,
     get_user_by_email,
     get_user_by_mobile,
+    missing_doctor_fields,
 )
+from app.utils.audit import audit_writer
+from app.utils.bulk_import import iter_upload_rows
+from app.utils.media import delete_profile_image, save_profile_image
 
 
-ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png"]
-MAX_IMAGE_SIZE = 5 * 1024 * 1024
+BULK_IMPORT_BATCH_SIZE = 500
 
 router = APIRouter()
 
@@ -38,39 +47,36 @@ def register_user(user: userCreateDP, session: SessionDep):
     if get_user_by_mobile(session, user.mobile):
         raise HTTPException(status_code=400, detail="Mobile number already registered")
 
+    missing_fields = missing_doctor_fields(user)
+    if missing_fields:
+        raise HTTPException(
+            status_code=400, detail=f"{missing_fields[0]} is required for doctors"
+        )
+
+    # Save the image only once the request is known to be valid
     profile_image_path = None
     if user.profile_image and user.profile_image.filename:
-        if user.profile_image.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(status_code=400, detail="Only JPEG/PNG images allowed")
-        contents = user.profile_image.file.read()
-        if len(contents) > MAX_IMAGE_SIZE:
-            raise HTTPException(status_code=400, detail="Image size exceeds 5mb limit")
-
-        extension = user.profile_image.filename.split(".")[-1]
-        filename = f"{uuid.uuid4().hex}.{extension}"
-        filepath = os.path.join("media/profile_images", filename)
-
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "wb") as f:
-            f.write(contents)
-        profile_image_path = filepath
+        profile_image_path = save_profile_image(user.profile_image)
 
     user_data = user.model_dump(exclude={"profile_image"})
     user_data["profile_image"] = profile_image_path
 
-    if user.user_type == UserType.doctor:
-        required_fields = {
-            "license_number": user.license_number,
-            "experience_years": user.experience_years,
-            "consultation_fee": user.consultation_fee,
-            "available_timeslots": user.available_timeslots,
-        }
-        for field, value in required_fields.items():
-            if value is None:
-                raise HTTPException(
-                    status_code=400, detail=f"{field} is required for doctors"
-                )
-    return create_user(session, UserCreate(**user_data))
+    try:
+        return create_user(session, UserCreate(**user_data))
+    except Exception:
+        delete_profile_image(profile_image_path)
+        raise
+
+
+@router.post("/bulk-import", response_model=BulkImportReport)
+def bulk_import_users(
+    session: SessionDep,
+    admin_user: Annotated[UserRead, Depends(get_current_admin)],
+    file: Annotated[UploadFile, File(description="CSV with a header row, or JSONL")],
+):
+    return bulk_create_users(
+        session, iter_upload_rows(file), batch_size=BULK_IMPORT_BATCH_SIZE
+    )
 
 
 @router.post("/login", response_model=Token)
@@ -103,44 +109,43 @@ def admin_dashboard(doctor_user: Annotated[UserRead, Depends(get_current_doctor)
     return doctor_user
 
 
-@router.patch("/me", response_model=UserRead)
-def update_my_profile(
+def _update_profile(
     session: SessionDep,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
-    update_data: userUpdateDP,
+    user_id: int,
+    update_data: UserUpdateForm,
+    current_user: UserRead,
+    previous_image: str | None,
 ):
-    # Handle profile image upload if provided
-    profile_image_path = current_user.profile_image
+    user_update = update_data.model_dump(exclude={"profile_image"}, exclude_unset=True)
     if update_data.profile_image:
-        if update_data.profile_image.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(status_code=400, detail="Only JPEG/PNG images allowed")
-
-        contents = update_data.profile_image.file.read()
-        if len(contents) > MAX_IMAGE_SIZE:
-            raise HTTPException(status_code=400, detail="Image size exceeds 5mb limit")
+        user_update["profile_image"] = save_profile_image(update_data.profile_image)
 
-        # Delete old image if it exists
-        if profile_image_path and os.path.exists(profile_image_path):
-            os.remove(profile_image_path)
-
-        # Save new image
-        extension = update_data.profile_image.filename.split(".")[-1]
-        filename = f"{uuid.uuid4().hex}.{extension}"
-        filepath = os.path.join("media/profile_images", filename)
+    try:
+        updated_user = update_user(
+            session, user_id, UserUpdate(**user_update), current_user
+        )
+    except Exception:
+        delete_profile_image(user_update.get("profile_image"))
+        raise
 
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "wb") as f:
-            f.write(contents)
+    # Delete old image only after the new path is committed
+    if "profile_image" in user_update:
+        delete_profile_image(previous_image)
+    return updated_user
 
-        profile_image_path = filepath
 
-    # Prepare update data
-    user_update = update_data.model_dump(exclude={"profile_image"}, exclude_unset=True)
-    if profile_image_path:
-        user_update["profile_image"] = profile_image_path
-
-    return update_user(
-        session, current_user.id, UserUpdate(**user_update), current_user
+@router.patch("/me", response_model=UserRead)
+def update_my_profile(
+    session: SessionDep,
+    current_user: Annotated[UserRead, Depends(get_current_user)],
+    update_data: userUpdateDP,
+):
+    return _update_profile(
+        session,
+        current_user.id,
+        update_data,
+        current_user,
+        current_user.profile_image,
     )
 
 
@@ -152,34 +157,12 @@ def update_user_profile(
     current_user: Annotated[UserRead, Depends(get_current_admin)],
 ):
     # Similar to above but only accessible by admin
-    profile_image_path = None
+    previous_image = None
     if update_data.profile_image:
-        if update_data.profile_image.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(status_code=400, detail="Only JPEG/PNG images allowed")
-
-        contents = update_data.profile_image.file.read()
-        if len(contents) > MAX_IMAGE_SIZE:
-            raise HTTPException(status_code=400, detail="Image size exceeds 5mb limit")
+        target_user = session.get(User, user_id)
+        previous_image = target_user.profile_image if target_user else None
 
-        # Delete old image if it exists
-        if profile_image_path and os.path.exists(profile_image_path):
-            os.remove(profile_image_path)
-
-        # Save new image
-        extension = update_data.profile_image.filename.split(".")[-1]
-        filename = f"{uuid.uuid4().hex}.{extension}"
-        filepath = os.path.join("media/profile_images", filename)
-
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "wb") as f:
-            f.write(contents)
-
-        profile_image_path = filepath
-    user_update = update_data.model_dump(exclude={"profile_image"}, exclude_unset=True)
-    if profile_image_path:
-        user_update["profile_image"] = profile_image_path
-
-    return update_user(session, user_id, UserUpdate(**user_update), current_user)
+    return _update_profile(session, user_id, update_data, current_user, previous_image)
 
 
 @router.post("/me/change-password")
@@ -197,4 +180,8 @@ def change_password(
     current_user.hashed_password = hashed_password
     session.add(current_user)
     session.commit()
+    # Never put password material in the audit trail
+    audit_writer.record(
+        "user.password_changed", "user", current_user.id, actor_id=current_user.id
+    )
     return {"message": "Password updated successfully"}
@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive/appointments")
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "365"))
+
+
+def archive_cutoff(now: datetime | None = None) -> datetime:
+    return (now or datetime.now()) - timedelta(days=ARCHIVE_HORIZON_DAYS)
+
+
+def _month_path(year: int, month: int) -> str:
+    # One gzip file per appointment month; each archival batch appends a new
+    # gzip member, which gzip.open reads back as one continuous stream.
+    return os.path.join(ARCHIVE_DIR, f"{year:04d}-{month:02d}.jsonl.gz")
+
+
+def append_records(records: list[dict]):
+    by_month: dict[str, list[dict]] = {}
+    for record in records:
+        appointment_date = datetime.fromisoformat(record["appointment_date"])
+        path = _month_path(appointment_date.year, appointment_date.month)
+        by_month.setdefault(path, []).append(record)
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for path, month_records in by_month.items():
+        payload = "".join(
+            json.dumps(r, separators=(",", ":")) + "\n" for r in month_records
+        )
+        with open(path, "ab") as f:
+            f.write(gzip.compress(payload.encode()))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _read_path(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _archived_months() -> list[tuple[int, int]]:
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    return sorted(
+        (int(name[:4]), int(name[5:7]))
+        for name in os.listdir(ARCHIVE_DIR)
+        if name.endswith(".jsonl.gz")
+    )
+
+
+def read_months(
+    months: Iterable[date], predicate: Callable[[dict], bool]
+) -> Iterator[dict]:
+    for month in months:
+        path = _month_path(month.year, month.month)
+        if os.path.exists(path):
+            yield from (record for record in _read_path(path) if predicate(record))
+
+
+def iter_all_records() -> Iterator[dict]:
+    for year, month in _archived_months():
+        yield from _read_path(_month_path(year, month))
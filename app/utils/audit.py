@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlmodel import Session
+from app.database import engine
+from app.models.audit import AuditLog, AuditQueueStats
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AUDIT_SINK = os.getenv("AUDIT_SINK", "database")
+AUDIT_FILE = os.getenv("AUDIT_FILE", os.path.join("audit", "audit.jsonl"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+AUDIT_ENQUEUE_TIMEOUT_SECONDS = float(
+    os.getenv("AUDIT_ENQUEUE_TIMEOUT_SECONDS", "0.05")
+)
+
+_STOP = object()
+_file_lock = threading.Lock()
+
+
+def _write_database(events: list[dict]):
+    # One executemany INSERT per batch
+    with Session(engine) as session:
+        session.exec(insert(AuditLog), params=events)
+        session.commit()
+
+
+def _write_file(events: list[dict]):
+    # Shared by the writer thread and by request threads on overflow
+    directory = os.path.dirname(AUDIT_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+    with _file_lock, open(AUDIT_FILE, "a", encoding="utf-8") as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+AUDIT_SINKS = {
+    "database": _write_database,
+    "file": _write_file,
+}
+
+
+class AuditWriter:
+    """Buffers audit events in memory and writes them in batches off the request path"""
+
+    def __init__(
+        self,
+        sink: str = AUDIT_SINK,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.sink = sink
+        self._write = AUDIT_SINKS[sink]
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread: threading.Thread | None = None
+        self._stats_lock = threading.Lock()
+        self._enqueued = 0
+        self._flushed = 0
+        self._overflowed = 0
+        self._dropped = 0
+        self._failed_flushes = 0
+        self._last_flush_size = 0
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+
+    def record(
+        self,
+        action: str,
+        entity_type: str,
+        entity_id: int,
+        actor_id: int | None = None,
+        changes: dict | None = None,
+    ):
+        event = {
+            "actor_id": actor_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "changes": changes or {},
+            "created_at": datetime.now(),
+        }
+        # A full queue means the sink has fallen behind; waiting longer than
+        # the timeout would stall requests, so the event is appended to the
+        # file directly instead.
+        try:
+            self._queue.put(event, timeout=AUDIT_ENQUEUE_TIMEOUT_SECONDS)
+        except queue.Full:
+            self._overflow(event)
+            return
+        with self._stats_lock:
+            self._enqueued += 1
+
+    def _overflow(self, event: dict):
+        try:
+            _write_file([event])
+        except Exception:
+            logger.exception(
+                "Audit queue full and %s unwritable, dropped %s %s",
+                AUDIT_FILE,
+                event["action"],
+                event["entity_id"],
+            )
+            with self._stats_lock:
+                self._dropped += 1
+            return
+        with self._stats_lock:
+            self._overflowed += 1
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="audit", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        # The sentinel queues behind every pending event, so the writer drains
+        # the queue before it exits.
+        if not self._thread:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                event = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                event = None
+
+            if event is _STOP:
+                self._flush(batch)
+                return
+            if event is not None:
+                batch.append(event)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch: list[dict]):
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            self._write(batch)
+        except Exception:
+            logger.exception("Audit flush of %s events failed", len(batch))
+            with self._stats_lock:
+                self._failed_flushes += 1
+            if self._write is _write_file:
+                return
+            # Keep the events in the append-only file rather than losing them
+            try:
+                _write_file(batch)
+            except Exception:
+                logger.exception("Audit fallback to %s failed", AUDIT_FILE)
+                return
+        latency = time.monotonic() - started
+        with self._stats_lock:
+            self._flushed += len(batch)
+            self._last_flush_size = len(batch)
+            self._last_flush_latency = latency
+            self._max_flush_latency = max(self._max_flush_latency, latency)
+
+    def stats(self) -> AuditQueueStats:
+        with self._stats_lock:
+            return AuditQueueStats(
+                sink=self.sink,
+                queue_depth=self._queue.qsize(),
+                queue_capacity=self._queue.maxsize,
+                enqueued=self._enqueued,
+                flushed=self._flushed,
+                overflowed=self._overflowed,
+                dropped=self._dropped,
+                failed_flushes=self._failed_flushes,
+                last_flush_size=self._last_flush_size,
+                last_flush_latency_ms=round(self._last_flush_latency * 1000, 3),
+                max_flush_latency_ms=round(self._max_flush_latency * 1000, 3),
+            )
+
+
+audit_writer = AuditWriter()
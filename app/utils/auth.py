@@ -1,4 +1,7 @@
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
 import jwt
 from passlib.context import CryptContext
 import os
@@ -9,6 +12,7 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,6 +25,36 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+_hash_pool: ProcessPoolExecutor | None = None
+_hash_pool_lock = threading.Lock()
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    # bcrypt is CPU-bound, so bulk hashing fans out across processes.
+    # "spawn" avoids forking a server process that is running threads.
+    global _hash_pool
+    if len(passwords) < 2 or PASSWORD_HASH_WORKERS < 2:
+        return [get_password_hash(password) for password in passwords]
+    # Imports run in the threadpool, so two of them may get here at once
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        pool = _hash_pool
+    chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+    return list(pool.map(get_password_hash, passwords, chunksize=chunksize))
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
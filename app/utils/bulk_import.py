@@ -0,0 +1,47 @@
+import codecs
+import csv
+import json
+from typing import Iterator
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _check_encoding(upload: UploadFile):
+    # A decode error halfway through the stream would only surface after
+    # earlier batches were committed, so the whole file is checked first.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    offset = 0
+    try:
+        while chunk := upload.file.read(CHUNK_SIZE):
+            decoder.decode(chunk)
+            offset += len(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File is not valid UTF-8 (byte {offset + exc.start})",
+        )
+    finally:
+        upload.file.seek(0)
+
+
+def iter_upload_rows(upload: UploadFile) -> Iterator[tuple[int, dict]]:
+    # Decode and parse line by line so large files are never held in memory.
+    # Row numbers are 1-based data rows (the CSV header is not counted).
+    _check_encoding(upload)
+    lines = codecs.iterdecode(upload.file, "utf-8-sig")
+    filename = (upload.filename or "").lower()
+
+    if filename.endswith((".jsonl", ".ndjson")):
+        row_number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield row_number, None
+    else:
+        yield from enumerate(csv.DictReader(lines), start=1)
@@ -0,0 +1,253 @@
+import heapq
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlmodel import Session, select, delete
+from app.models.appointment import SlotHold
+from app.models.user import User
+from app.utils.timeslots import SLOT_MINUTES
+
+load_dotenv()
+
+SLOT_HOLD_TTL_SECONDS = int(os.getenv("SLOT_HOLD_TTL_SECONDS", "120"))
+SLOT_HOLD_BACKEND = os.getenv("SLOT_HOLD_BACKEND", "memory")
+
+
+def _window(appointment_date: datetime) -> tuple[datetime, datetime]:
+    # Holds block the same window an appointment does
+    slot = timedelta(minutes=SLOT_MINUTES)
+    return appointment_date - slot, appointment_date + slot
+
+
+class HoldBackend(ABC):
+    """Storage for active slot holds; one instance is shared per process"""
+
+    @abstractmethod
+    def acquire(
+        self,
+        session: Session,
+        doctor_id: int,
+        patient_id: int,
+        appointment_date: datetime,
+    ) -> SlotHold | None:
+        # Returns None when another patient holds an overlapping slot. A new
+        # hold is committed through session; on None the session's
+        # transaction is left for the caller to commit or roll back.
+        ...
+
+    @abstractmethod
+    def is_held(
+        self,
+        session: Session,
+        doctor_id: int,
+        appointment_date: datetime,
+        patient_id: int | None = None,
+    ) -> bool:
+        # Holds owned by patient_id never block that patient
+        ...
+
+    @abstractmethod
+    def consume(self, session: Session, hold_id: str, appointment) -> bool:
+        # Removes the hold if it is active and matches the appointment
+        ...
+
+    @abstractmethod
+    def restore(self, session: Session, hold_id: str):
+        # Undoes consume() when the booking transaction did not commit
+        ...
+
+    @abstractmethod
+    def release(self, session: Session, hold_id: str, patient_id: int) -> bool: ...
+
+    @abstractmethod
+    def purge_expired(self, session: Session) -> int: ...
+
+
+class InMemoryHoldBackend(HoldBackend):
+    """Holds for a single worker process, expired through a min-heap"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._holds: dict[str, SlotHold] = {}
+        self._by_doctor: dict[int, dict[str, SlotHold]] = {}
+        self._expiry: list[tuple[datetime, str]] = []
+        # Consumed holds are kept until they expire so a booking that fails
+        # to commit can put its hold back.
+        self._consumed: dict[str, SlotHold] = {}
+
+    def _purge(self, now: datetime) -> int:
+        # Heap entries of consumed or released holds are skipped lazily
+        purged = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry)
+            self._consumed.pop(hold_id, None)
+            if self._remove(hold_id):
+                purged += 1
+        return purged
+
+    def _add(self, hold: SlotHold):
+        self._holds[hold.id] = hold
+        self._by_doctor.setdefault(hold.doctor_id, {})[hold.id] = hold
+
+    def _remove(self, hold_id: str) -> SlotHold | None:
+        hold = self._holds.pop(hold_id, None)
+        if hold:
+            doctor_holds = self._by_doctor[hold.doctor_id]
+            del doctor_holds[hold_id]
+            if not doctor_holds:
+                del self._by_doctor[hold.doctor_id]
+        return hold
+
+    def _overlapping(self, doctor_id: int, appointment_date: datetime):
+        start, end = _window(appointment_date)
+        for hold in self._by_doctor.get(doctor_id, {}).values():
+            if start <= hold.appointment_date <= end:
+                yield hold
+
+    def acquire(self, session, doctor_id, patient_id, appointment_date):
+        now = datetime.now()
+        with self._lock:
+            self._purge(now)
+            overlapping = list(self._overlapping(doctor_id, appointment_date))
+            if any(hold.patient_id != patient_id for hold in overlapping):
+                return None
+            # A patient re-holding nearby replaces their earlier hold
+            for hold in overlapping:
+                self._remove(hold.id)
+
+            hold = SlotHold(
+                id=uuid.uuid4().hex,
+                doctor_id=doctor_id,
+                patient_id=patient_id,
+                appointment_date=appointment_date,
+                expires_at=now + timedelta(seconds=SLOT_HOLD_TTL_SECONDS),
+            )
+            self._add(hold)
+            heapq.heappush(self._expiry, (hold.expires_at, hold.id))
+            return hold
+
+    def is_held(self, session, doctor_id, appointment_date, patient_id=None):
+        with self._lock:
+            self._purge(datetime.now())
+            return any(
+                hold.patient_id != patient_id
+                for hold in self._overlapping(doctor_id, appointment_date)
+            )
+
+    def consume(self, session, hold_id, appointment):
+        with self._lock:
+            self._purge(datetime.now())
+            hold = self._holds.get(hold_id)
+            if (
+                not hold
+                or hold.patient_id != appointment.patient_id
+                or hold.doctor_id != appointment.doctor_id
+                or hold.appointment_date != appointment.appointment_date
+            ):
+                return False
+            self._consumed[hold_id] = self._remove(hold_id)
+            return True
+
+    def restore(self, session, hold_id):
+        with self._lock:
+            self._purge(datetime.now())
+            hold = self._consumed.pop(hold_id, None)
+            if not hold:
+                return
+            # The slot may have been held by someone else in the meantime
+            overlapping = self._overlapping(hold.doctor_id, hold.appointment_date)
+            if any(other.patient_id != hold.patient_id for other in overlapping):
+                return
+            self._add(hold)
+
+    def release(self, session, hold_id, patient_id):
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if not hold or hold.patient_id != patient_id:
+                return False
+            self._remove(hold_id)
+            return True
+
+    def purge_expired(self, session):
+        with self._lock:
+            return self._purge(datetime.now())
+
+
+class DatabaseHoldBackend(HoldBackend):
+    """Holds shared by every worker through the slothold table"""
+
+    def _active(self, doctor_id: int, appointment_date: datetime):
+        start, end = _window(appointment_date)
+        return select(SlotHold).where(
+            SlotHold.doctor_id == doctor_id,
+            SlotHold.appointment_date >= start,
+            SlotHold.appointment_date <= end,
+            SlotHold.expires_at > datetime.now(),
+        )
+
+    def acquire(self, session, doctor_id, patient_id, appointment_date):
+        # Locking the doctor's row serializes competing holds for that doctor
+        session.exec(select(User.id).where(User.id == doctor_id).with_for_update())
+        overlapping = session.exec(self._active(doctor_id, appointment_date)).all()
+        if any(hold.patient_id != patient_id for hold in overlapping):
+            return None
+        for hold in overlapping:
+            session.delete(hold)
+
+        hold = SlotHold(
+            id=uuid.uuid4().hex,
+            doctor_id=doctor_id,
+            patient_id=patient_id,
+            appointment_date=appointment_date,
+            expires_at=datetime.now() + timedelta(seconds=SLOT_HOLD_TTL_SECONDS),
+        )
+        session.add(hold)
+        session.commit()
+        return hold
+
+    def is_held(self, session, doctor_id, appointment_date, patient_id=None):
+        statement = self._active(doctor_id, appointment_date)
+        if patient_id is not None:
+            statement = statement.where(SlotHold.patient_id != patient_id)
+        return session.exec(statement.limit(1)).first() is not None
+
+    def consume(self, session, hold_id, appointment):
+        # Runs inside the booking transaction: the hold disappears if and only
+        # if the appointment commits.
+        statement = delete(SlotHold).where(
+            SlotHold.id == hold_id,
+            SlotHold.patient_id == appointment.patient_id,
+            SlotHold.doctor_id == appointment.doctor_id,
+            SlotHold.appointment_date == appointment.appointment_date,
+            SlotHold.expires_at > datetime.now(),
+        )
+        return session.exec(statement).rowcount == 1
+
+    def restore(self, session, hold_id):
+        # The DELETE was part of the booking transaction and rolled back with it
+        pass
+
+    def release(self, session, hold_id, patient_id):
+        statement = delete(SlotHold).where(
+            SlotHold.id == hold_id, SlotHold.patient_id == patient_id
+        )
+        released = session.exec(statement).rowcount == 1
+        session.commit()
+        return released
+
+    def purge_expired(self, session):
+        statement = delete(SlotHold).where(SlotHold.expires_at <= datetime.now())
+        purged = session.exec(statement).rowcount
+        session.commit()
+        return purged
+
+
+HOLD_BACKENDS = {
+    "memory": InMemoryHoldBackend,
+    "database": DatabaseHoldBackend,
+}
+
+hold_backend: HoldBackend = HOLD_BACKENDS[SLOT_HOLD_BACKEND]()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import time
+import uuid
+from itertools import islice
+from typing import Iterator
+from fastapi import HTTPException, UploadFile
+from sqlmodel import Session, select
+from app.models.user import User
+
+PROFILE_IMAGE_DIR = os.path.join("media", "profile_images")
+ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png"]
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+
+
+def _sharded_path(filename: str) -> str:
+    # media/profile_images/ab/cd/abcd....jpg keeps every directory small
+    # (at most 65,536 leaf directories for the whole store).
+    return os.path.join(PROFILE_IMAGE_DIR, filename[:2], filename[2:4], filename)
+
+
+def save_profile_image(image: UploadFile) -> str:
+    if image.content_type not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(status_code=400, detail="Only JPEG/PNG images allowed")
+    contents = image.file.read()
+    if len(contents) > MAX_IMAGE_SIZE:
+        raise HTTPException(status_code=400, detail="Image size exceeds 5mb limit")
+
+    extension = image.filename.split(".")[-1]
+    filepath = _sharded_path(f"{uuid.uuid4().hex}.{extension}")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "wb") as f:
+        f.write(contents)
+    return filepath
+
+
+def _in_store(path: str) -> bool:
+    root = os.path.abspath(PROFILE_IMAGE_DIR)
+    return os.path.commonpath([root, os.path.abspath(path)]) == root
+
+
+def delete_profile_image(path: str | None):
+    # Stored paths come from the database; never follow one outside the store
+    if not path or not _in_store(path):
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _iter_files(directory: str) -> Iterator[os.DirEntry]:
+    # scandir streams entries, so huge directories are never listed in full
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def collect_orphaned_images(
+    session: Session, grace_seconds: float, batch_size: int = 1000
+) -> dict:
+    # Files younger than the grace period may belong to a registration or
+    # profile update that has not committed yet.
+    cutoff = time.time() - grace_seconds
+    report = {"scanned": 0, "deleted": 0, "reclaimed_bytes": 0, "retained_bytes": 0}
+    files = _iter_files(PROFILE_IMAGE_DIR)
+
+    while batch := list(islice(files, batch_size)):
+        report["scanned"] += len(batch)
+        candidates = {}
+        for entry in batch:
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime < cutoff:
+                candidates[entry.path] = stat.st_size
+            else:
+                report["retained_bytes"] += stat.st_size
+        if not candidates:
+            continue
+
+        # Stored paths may be relative or absolute, or spelled differently
+        # from the scanned path; look up each spelling, compare normalized.
+        spellings = {
+            variant
+            for path in candidates
+            for variant in (path, os.path.normpath(path), os.path.abspath(path))
+        }
+        referenced = {
+            os.path.normpath(os.path.abspath(path))
+            for path in session.exec(
+                select(User.profile_image).where(
+                    User.profile_image.in_(list(spellings))
+                )
+            ).all()
+        }
+        for path, size in candidates.items():
+            if os.path.normpath(os.path.abspath(path)) in referenced:
+                report["retained_bytes"] += size
+                continue
+            delete_profile_image(path)
+            report["deleted"] += 1
+            report["reclaimed_bytes"] += size
+
+    return report
+
+
+def migrate_flat_images(session: Session, batch_size: int = 500) -> dict:
+    # Moves images saved before sharding (media/profile_images/abcd....jpg)
+    # to their sharded path. Each batch is copied, committed, then the old
+    # files are removed, so a failed run never leaves a row without its file.
+    report = {"moved": 0, "missing": 0}
+    last_id = 0
+    while True:
+        users = session.exec(
+            select(User)
+            .where(User.id > last_id, User.profile_image.is_not(None))
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        if not users:
+            return report
+        last_id = users[-1].id
+
+        moved = []
+        for user in users:
+            old_path = user.profile_image
+            new_path = _sharded_path(os.path.basename(old_path))
+            sharded = os.path.abspath(old_path) == os.path.abspath(new_path)
+            if sharded or not _in_store(old_path):
+                continue
+            if not os.path.isfile(old_path):
+                report["missing"] += 1
+                continue
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            shutil.copy2(old_path, new_path)
+            user.profile_image = new_path
+            moved.append(old_path)
+        session.commit()
+
+        for old_path in moved:
+            delete_profile_image(old_path)
+        report["moved"] += len(moved)
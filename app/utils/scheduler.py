@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every worker; only the holder of this
+# Postgres advisory lock runs scheduled jobs.
+SCHEDULER_LOCK_KEY = 72_410_026
+
+
+class LeaderLock:
+    """Session-level advisory lock so only one worker runs the scheduler"""
+
+    def __init__(self, engine: Engine, key: int = SCHEDULER_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self._conn: Connection | None = None
+
+    def acquire(self) -> bool:
+        # Non-Postgres databases (SQLite in development) run a single process,
+        # so that process is always the leader.
+        if self.engine.dialect.name != "postgresql":
+            return True
+
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                logger.warning("Scheduler lock connection lost, re-electing")
+                self.release()
+
+        conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+        ).scalar()
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": self.key}
+            )
+        except Exception:
+            pass
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], dict]
+    interval: float
+    next_run: float = 0.0
+    last_result: dict = field(default_factory=dict)
+
+
+class Scheduler:
+    """In-process periodic runner for maintenance jobs"""
+
+    def __init__(self, engine: Engine, tick_seconds: float = 5.0):
+        self.lock = LeaderLock(engine)
+        self.tick_seconds = tick_seconds
+        self.jobs: list[Job] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add_job(self, name: str, func: Callable[[], dict], interval: float):
+        # First run happens one interval after startup, not during boot.
+        self.jobs.append(
+            Job(
+                name=name,
+                func=func,
+                interval=interval,
+                next_run=time.monotonic() + interval,
+            )
+        )
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 30.0):
+        # The lock's connection belongs to the scheduler thread, which
+        # releases it on exit; a job still running past the timeout keeps it
+        # until it finishes.
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Scheduler still running a job after %ss", timeout)
+            self._thread = None
+
+    def run_job(self, job: Job) -> dict:
+        started = time.perf_counter()
+        try:
+            result = job.func()
+        except Exception:
+            logger.exception("Scheduled job %s failed", job.name)
+            result = {"error": True}
+        result["duration_seconds"] = round(time.perf_counter() - started, 3)
+        job.last_result = result
+        logger.info("Scheduled job %s finished: %s", job.name, result)
+        return result
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            self.lock.release()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                is_leader = self.lock.acquire()
+            except Exception:
+                logger.exception("Scheduler leader election failed")
+                is_leader = False
+
+            if is_leader:
+                for job in self.jobs:
+                    if self._stop.is_set():
+                        break
+                    if time.monotonic() >= job.next_run:
+                        self.run_job(job)
+                        job.next_run = time.monotonic() + job.interval
+
+            self._stop.wait(self.tick_seconds)
@@ -0,0 +1,24 @@
+from operator import attrgetter
+from fastapi.responses import ORJSONResponse
+from app.models.appointment import Appointment, AppointmentRead
+
+# Column order matches AppointmentRead so the JSON output is identical to
+# what FastAPI produces through the response_model.
+APPOINTMENT_FIELDS = tuple(AppointmentRead.model_fields)
+APPOINTMENT_COLUMNS = tuple(getattr(Appointment, name) for name in APPOINTMENT_FIELDS)
+
+_appointment_values = attrgetter(*APPOINTMENT_FIELDS)
+
+
+def appointment_to_dict(appointment: Appointment) -> dict:
+    return dict(zip(APPOINTMENT_FIELDS, _appointment_values(appointment)))
+
+
+def appointment_response(appointment: Appointment) -> ORJSONResponse:
+    # Returning a Response skips FastAPI's response_model validation and
+    # jsonable_encoder pass; orjson encodes datetimes and enums natively.
+    return ORJSONResponse(appointment_to_dict(appointment))
+
+
+def appointment_list_response(rows: list[dict]) -> ORJSONResponse:
+    return ORJSONResponse(rows)
@@ -0,0 +1,15 @@
+# Bookings closer than this to each other overlap (see has_overlapping_appointment)
+SLOT_MINUTES = 30
+
+
+def parse_timeslots(available_timeslots: str) -> tuple[int, int]:
+    # "09:00-17:00" -> (9, 17); only whole hours are significant
+    start_str, end_str = available_timeslots.split("-")
+    return int(start_str.split(":")[0]), int(end_str.split(":")[0])
+
+
+def slots_per_day(available_timeslots: str | None) -> int:
+    if not available_timeslots:
+        return 0
+    start_hour, end_hour = parse_timeslots(available_timeslots)
+    return max(end_hour - start_hour, 0) * 60 // SLOT_MINUTES
@@ -0,0 +1,78 @@
+"""Compare FastAPI's response_model path with the orjson fast path.
+
+Run from the repository root:
+
+    python -m benchmarks.serialization
+"""
+
+import asyncio
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.models.appointment import Appointment, AppointmentRead, AppointmentStatus
+from app.utils.serialization import appointment_list_response, appointment_to_dict
+
+SIZES = (10, 1_000, 10_000)
+
+loop = asyncio.new_event_loop()
+response_field = create_model_field(
+    name="Response_get_my_appointments",
+    type_=List[AppointmentRead],
+    mode="serialization",
+)
+
+
+def make_appointments(count: int) -> list[Appointment]:
+    start = datetime(2025, 1, 1, 9, 0)
+    return [
+        Appointment(
+            id=i,
+            doctor_id=1,
+            patient_id=2 + i % 50,
+            appointment_date=start + timedelta(minutes=45 * i),
+            notes="Fever and headache for two days" if i % 3 else None,
+            status=list(AppointmentStatus)[i % 4],
+            created_at=start,
+        )
+        for i in range(count)
+    ]
+
+
+def current_path(appointments: list[Appointment]) -> bytes:
+    # What FastAPI does for response_model=List[AppointmentRead]
+    content = loop.run_until_complete(
+        serialize_response(field=response_field, response_content=appointments)
+    )
+    return JSONResponse(content).body
+
+
+def fast_path(appointments: list[Appointment]) -> bytes:
+    # Starts from the same objects, so the dict conversion is timed too
+    rows = [appointment_to_dict(a) for a in appointments]
+    return appointment_list_response(rows).body
+
+
+def main():
+    print(f"{'items':>7} {'current ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for size in SIZES:
+        appointments = make_appointments(size)
+        assert current_path(appointments) == fast_path(appointments)
+
+        number = max(1, 20_000 // size)
+        current = min(
+            timeit.repeat(lambda: current_path(appointments), number=number, repeat=5)
+        )
+        fast = min(
+            timeit.repeat(lambda: fast_path(appointments), number=number, repeat=5)
+        )
+        print(
+            f"{size:>7} {current / number * 1000:>11.3f} "
+            f"{fast / number * 1000:>9.3f} {current / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import itertools
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Point the app at a throwaway database before anything reads the
+# environment; load_dotenv() never overrides variables that are already set.
+# TEST_DATABASE_URL may name a scratch Postgres database: every table in it
+# is dropped after each test.
+_tmpdir = tempfile.mkdtemp(prefix="healthcare-tests-")
+os.environ["LOCAL_DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+)
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["ALGORITHM"] = "HS256"
+os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "30"
+os.environ["AUDIT_FILE"] = os.path.join(_tmpdir, "audit.jsonl")
+os.environ["SLOT_HOLD_BACKEND"] = "memory"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User, UserType  # noqa: E402
+from app.utils import archive  # noqa: E402
+from app.utils.auth import create_access_token, get_password_hash  # noqa: E402
+
+PASSWORD = "Passw0rd!"
+
+
+@pytest.fixture(autouse=True)
+def database():
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    return archive.ARCHIVE_DIR
+
+
+@pytest.fixture
+def session():
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def hashed_password():
+    # bcrypt is slow on purpose; hash once for every seeded user
+    return get_password_hash(PASSWORD)
+
+
+@pytest.fixture
+def make_user(session, hashed_password):
+    counter = itertools.count(1)
+
+    def make_user(user_type: UserType = UserType.patient, **fields) -> User:
+        n = next(counter)
+        if user_type == UserType.doctor:
+            fields = {
+                "license_number": f"LIC{n}",
+                "experience_years": 5,
+                "consultation_fee": 500,
+                "available_timeslots": "09:00-17:00",
+                **fields,
+            }
+        user = User(
+            full_name=f"{user_type.value} {n}",
+            email=f"{user_type.value}{n}@example.com",
+            mobile=f"+8801{n:09d}",
+            user_type=user_type,
+            hashed_password=hashed_password,
+            **fields,
+        )
+        session.add(user)
+        session.commit()
+        return user
+
+    return make_user
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager: the lifespan would start the scheduler
+    # and the audit writer threads.
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    def auth_headers(user: User) -> dict:
+        token = create_access_token(data={"sub": user.email, "role": user.user_type})
+        return {"Authorization": f"Bearer {token}"}
+
+    return auth_headers
+
+
+@pytest.fixture
+def count_queries():
+    # Yields the SQL strings a block executes, or (statement, parameters)
+    # pairs with parameters=True
+    @contextmanager
+    def count_queries(parameters: bool = False):
+        statements: list = []
+
+        def capture(conn, cursor, statement, params, context, executemany):
+            statements.append((statement, params) if parameters else statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+    return count_queries
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from app.crud.analytics import (
+    rebuild_doctor_daily_stats,
+    record_booking,
+    record_status_change,
+)
+from app.crud.appointment import (
+    archive_appointments,
+    complete_past_appointments,
+    expire_pending_appointments,
+)
+from app.models.analytics import DoctorDailyStats
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import UserType
+from app.models.appointment import AppointmentRead
+from app.utils import archive
+from app.utils.archive import archive_cutoff
+
+DAY = (datetime.now() + timedelta(days=10)).replace(
+    hour=9, minute=0, second=0, microsecond=0
+)
+
+
+def book(client, doctor, headers, appointment_date):
+    response = client.post(
+        "/api/appointments/book",
+        json={"doctor_id": doctor.id, "appointment_date": appointment_date.isoformat()},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def change_status(client, appointment_id, new_status, headers):
+    response = client.patch(
+        f"/api/appointments/{appointment_id}/status",
+        params={"new_status": new_status},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+
+def add_booked(session, doctor, patient, appointment_date, status):
+    # Rows the API cannot create (past dates), counted the way booking and a
+    # later status change count them
+    appointment = Appointment(
+        doctor_id=doctor.id,
+        patient_id=patient.id,
+        appointment_date=appointment_date,
+    )
+    session.add(appointment)
+    session.flush()
+    record_booking(session, appointment)
+    appointment.status = status
+    record_status_change(session, appointment, AppointmentStatus.pending)
+    session.commit()
+    return appointment
+
+
+def snapshot(session) -> dict:
+    session.expire_all()
+    return {
+        (row.doctor_id, row.day): (row.booked, row.cancelled, row.completed)
+        for row in session.exec(select(DoctorDailyStats)).all()
+        if row.booked or row.cancelled or row.completed
+    }
+
+
+def assert_matches_rebuild(session):
+    incremental = snapshot(session)
+    rebuild_doctor_daily_stats(session)
+    assert incremental == snapshot(session)
+    return incremental
+
+
+def test_utilization_report(client, make_user, auth_headers):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    admin = make_user(UserType.admin)
+    headers = auth_headers(patient)
+    ids = [book(client, doctor, headers, DAY + timedelta(hours=h)) for h in range(4)]
+    change_status(client, ids[0], "cancelled", headers)
+    change_status(client, ids[1], "completed", auth_headers(doctor))
+
+    response = client.get(
+        "/api/analytics/utilization",
+        params={"start": DAY.date().isoformat(), "end": DAY.date().isoformat()},
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    # 09:00-17:00 is 16 half-hour slots; 3 of 4 bookings still use one
+    expected = {
+        "booked": 4,
+        "cancelled": 1,
+        "completed": 1,
+        "cancellation_rate": 0.25,
+        "slot_utilization": 0.1875,
+    }
+    (doctor_row,) = report["doctors"]
+    assert doctor_row == {
+        "doctor_id": doctor.id,
+        "full_name": doctor.full_name,
+        **expected,
+    }
+    assert report["days"] == [{"day": DAY.date().isoformat(), **expected}]
+
+
+def test_utilization_report_defaults_and_validation(client, make_user, auth_headers):
+    admin = make_user(UserType.admin)
+    headers = auth_headers(admin)
+
+    report = client.get("/api/analytics/utilization", headers=headers).json()
+    assert (
+        datetime.fromisoformat(report["end"]) - datetime.fromisoformat(report["start"])
+    ).days == 29
+    assert report["doctors"] == report["days"] == []
+
+    response = client.get(
+        "/api/analytics/utilization",
+        params={"start": "2025-02-01", "end": "2025-01-01"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+def test_utilization_report_is_admin_only(client, make_user, auth_headers):
+    for user in (make_user(), make_user(UserType.doctor)):
+        response = client.get("/api/analytics/utilization", headers=auth_headers(user))
+        assert response.status_code == 403
+    assert client.get("/api/analytics/utilization").status_code == 401
+
+
+def test_incremental_counters_match_rebuild(client, session, make_user, auth_headers):
+    doctor = make_user(UserType.doctor)
+    other_doctor = make_user(UserType.doctor)
+    patient = make_user()
+    admin = make_user(UserType.admin)
+    headers = auth_headers(patient)
+
+    # Bookings and status changes through the API
+    ids = [
+        book(client, d, headers, DAY + timedelta(days=i, hours=i))
+        for i, d in enumerate([doctor, doctor, other_doctor, doctor])
+    ]
+    change_status(client, ids[0], "confirmed", auth_headers(doctor))
+    change_status(client, ids[1], "cancelled", headers)
+    change_status(client, ids[2], "completed", auth_headers(other_doctor))
+    change_status(client, ids[1], "confirmed", auth_headers(admin))
+    change_status(client, ids[3], "cancelled", headers)
+    counts = assert_matches_rebuild(session)
+    assert sum(booked for booked, _, _ in counts.values()) == 4
+
+    # Lifecycle sweeps
+    now = datetime.now()
+    past = now - timedelta(days=2)
+    add_booked(session, doctor, patient, past, AppointmentStatus.confirmed)
+    add_booked(
+        session,
+        doctor,
+        patient,
+        past + timedelta(hours=1),
+        AppointmentStatus.pending,
+    )
+    assert complete_past_appointments(session, now) == 1
+    assert expire_pending_appointments(session, now, timedelta(hours=24)) == 1
+    assert_matches_rebuild(session)
+
+    # Archival moves old closed rows out of the table but not the counts
+    old = (now - timedelta(days=400)).replace(hour=9)
+    for hours, status in enumerate(
+        [AppointmentStatus.completed, AppointmentStatus.cancelled]
+    ):
+        add_booked(session, doctor, patient, old + timedelta(hours=hours), status)
+    before = assert_matches_rebuild(session)
+    assert archive_appointments(session, archive_cutoff()) == 2
+    assert snapshot(session) == before
+    assert_matches_rebuild(session)
+
+
+def test_rebuild_skips_archived_rows_that_are_still_live(session, make_user):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    old = (datetime.now() - timedelta(days=400)).replace(hour=9)
+    appointment = add_booked(session, doctor, patient, old, AppointmentStatus.completed)
+
+    # Archive written but the batch DELETE never committed
+    archive.append_records(
+        [AppointmentRead.model_validate(appointment).model_dump(mode="json")]
+    )
+
+    rebuild_doctor_daily_stats(session)
+    (stats,) = session.exec(select(DoctorDailyStats)).all()
+    assert (stats.booked, stats.completed) == (1, 1)
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from app.crud.appointment import archive_appointments
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import UserType
+from app.utils import archive
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+def add_appointments(session, doctor, patient, dates, status):
+    appointments = [
+        Appointment(
+            doctor_id=doctor.id,
+            patient_id=patient.id,
+            appointment_date=appointment_date,
+            status=status,
+        )
+        for appointment_date in dates
+    ]
+    session.add_all(appointments)
+    session.commit()
+    return appointments
+
+
+def my_appointments(client, headers, **params):
+    response = client.get(
+        "/api/appointments/my-appointments", params=params, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_history_includes_archive_without_start(
+    client, session, make_user, auth_headers
+):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    old = [NOW - timedelta(days=500 + i) for i in range(6)]
+    add_appointments(session, doctor, patient, old, AppointmentStatus.completed)
+    upcoming = add_appointments(
+        session, doctor, patient, [NOW + timedelta(days=1)], AppointmentStatus.pending
+    )
+
+    cutoff = NOW - timedelta(days=365)
+    assert archive_appointments(session, cutoff, batch_size=4) == 6
+    assert len(session.exec(select(Appointment)).all()) == 1
+
+    headers = auth_headers(patient)
+    assert len(my_appointments(client, headers)) == 7
+    assert len(my_appointments(client, auth_headers(doctor))) == 7
+    ranged = my_appointments(
+        client, headers, start=(NOW - timedelta(days=502)).isoformat()
+    )
+    assert len(ranged) == 3 + 1
+    recent = my_appointments(client, headers, start=NOW.isoformat())
+    assert [a["id"] for a in recent] == [upcoming[0].id]
+
+
+def test_timezone_aware_range_is_accepted(client, session, make_user, auth_headers):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    add_appointments(
+        session,
+        doctor,
+        patient,
+        [NOW - timedelta(days=500)],
+        AppointmentStatus.completed,
+    )
+    archive_appointments(session, NOW - timedelta(days=365))
+
+    headers = auth_headers(patient)
+    appointments = my_appointments(
+        client, headers, start="2020-01-01T00:00:00Z", end="2099-01-01T00:00:00+06:00"
+    )
+    assert len(appointments) == 1
+
+
+def test_archived_ids_are_not_reused(client, session, make_user, auth_headers):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    (archived,) = add_appointments(
+        session,
+        doctor,
+        patient,
+        [NOW - timedelta(days=500)],
+        AppointmentStatus.completed,
+    )
+    archive_appointments(session, NOW - timedelta(days=365))
+    (live,) = add_appointments(
+        session, doctor, patient, [NOW + timedelta(days=1)], AppointmentStatus.pending
+    )
+
+    assert live.id != archived.id
+    ids = [a["id"] for a in my_appointments(client, auth_headers(patient))]
+    assert sorted(ids) == sorted([archived.id, live.id])
+
+
+def test_history_reads_only_the_users_archive_months(
+    client, session, make_user, auth_headers, monkeypatch
+):
+    doctor = make_user(UserType.doctor)
+    patient, other, newcomer = make_user(), make_user(), make_user()
+    mine = (NOW - timedelta(days=500)).replace(day=15)
+    theirs = (NOW - timedelta(days=600)).replace(day=15)
+    add_appointments(session, doctor, patient, [mine], AppointmentStatus.completed)
+    add_appointments(session, doctor, other, [theirs], AppointmentStatus.completed)
+    archive_appointments(session, NOW - timedelta(days=365))
+
+    opened = []
+    read_path = archive._read_path
+
+    def recording_read_path(path):
+        opened.append(path)
+        return read_path(path)
+
+    monkeypatch.setattr(archive, "_read_path", recording_read_path)
+
+    assert len(my_appointments(client, auth_headers(patient))) == 1
+    assert opened == [archive._month_path(mine.year, mine.month)]
+
+    opened.clear()
+    assert my_appointments(client, auth_headers(newcomer)) == []
+    assert my_appointments(client, auth_headers(patient), start=NOW.isoformat()) == []
+    assert opened == []
+
+    opened.clear()
+    assert len(my_appointments(client, auth_headers(doctor))) == 2
+    assert len(opened) == 2
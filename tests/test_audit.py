@@ -0,0 +1,74 @@
+import json
+import pytest
+from sqlmodel import select
+from app.models.audit import AuditLog
+from app.utils import audit
+from app.utils.audit import AuditWriter, audit_writer
+
+
+@pytest.fixture
+def audit_file(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    monkeypatch.setattr(audit, "AUDIT_FILE", str(path))
+    return path
+
+
+def read_lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_full_queue_overflows_to_file(audit_file, monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_ENQUEUE_TIMEOUT_SECONDS", 0)
+    writer = AuditWriter(sink="database", queue_size=1)
+
+    for entity_id in range(3):
+        writer.record("user.updated", "user", entity_id, actor_id=1)
+
+    stats = writer.stats()
+    assert (stats.queue_depth, stats.overflowed, stats.dropped) == (1, 2, 0)
+    assert [event["entity_id"] for event in read_lines(audit_file)] == [1, 2]
+
+
+def test_stop_drains_queue_into_database(session, audit_file):
+    writer = AuditWriter(sink="database", batch_size=2, flush_interval=60)
+    writer.start()
+    for entity_id in range(5):
+        writer.record(
+            "appointment.status_changed",
+            "appointment",
+            entity_id,
+            changes={"status": "cancelled"},
+        )
+    writer.stop()
+
+    rows = session.exec(select(AuditLog).order_by(AuditLog.id)).all()
+    assert [row.entity_id for row in rows] == list(range(5))
+    assert rows[0].changes == {"status": "cancelled"}
+    stats = writer.stats()
+    assert (stats.queue_depth, stats.flushed, stats.dropped) == (0, 5, 0)
+    assert not audit_file.exists()
+
+
+def test_failed_database_flush_falls_back_to_file(audit_file, monkeypatch):
+    def broken(events):
+        raise RuntimeError("database went away")
+
+    writer = AuditWriter(sink="database", batch_size=10, flush_interval=60)
+    monkeypatch.setattr(writer, "_write", broken)
+    writer.start()
+    writer.record("user.password_changed", "user", 7, actor_id=7)
+    writer.stop()
+
+    assert [event["entity_id"] for event in read_lines(audit_file)] == [7]
+    assert writer.stats().failed_flushes == 1
+
+
+def test_profile_update_is_audited(client, make_user, auth_headers):
+    patient = make_user()
+    before = audit_writer.stats().enqueued
+    response = client.patch(
+        "/api/users/me", data={"full_name": "Renamed"}, headers=auth_headers(patient)
+    )
+
+    assert response.status_code == 200, response.text
+    assert audit_writer.stats().enqueued == before + 1
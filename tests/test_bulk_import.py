@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+from sqlmodel import select
+from app.models.user import User, UserType
+from app.routers import users
+from app.utils import auth
+
+HEADER = "full_name,email,password,mobile,user_type\n"
+
+
+def upload(client, headers, content: bytes, filename: str = "users.csv"):
+    return client.post(
+        "/api/users/bulk-import",
+        files={"file": (filename, content, "text/csv")},
+        headers=headers,
+    )
+
+
+def test_surplus_cells_are_reported_as_row_errors(
+    client, session, make_user, auth_headers
+):
+    admin = make_user(UserType.admin)
+    content = (
+        HEADER
+        + "Ok Patient,ok@example.com,Passw0rd!,+8801700000001,patient\n"
+        + "Extra Cell,extra@example.com,Passw0rd!,+8801700000002,patient,surplus\n"
+    ).encode()
+
+    response = upload(client, auth_headers(admin), content)
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["total"] == 2
+    assert report["created"] == 1
+    assert report["errors"] == [
+        {
+            "row": 2,
+            "email": "extra@example.com",
+            "errors": ["Row has more values than the header"],
+        }
+    ]
+
+
+def test_invalid_utf8_is_rejected_before_any_insert(
+    client, session, make_user, auth_headers, monkeypatch
+):
+    # Small batches: the first ones would commit before the bad line is read
+    monkeypatch.setattr(users, "BULK_IMPORT_BATCH_SIZE", 2)
+    admin = make_user(UserType.admin)
+    valid_rows = "".join(
+        f"Patient {i},p{i}@example.com,Passw0rd!,+88017{i:08d},patient\n"
+        for i in range(3)
+    )
+    content = (HEADER + valid_rows).encode() + b"Bad \xff Name,bad@example.com\n"
+
+    response = upload(client, auth_headers(admin), content)
+
+    assert response.status_code == 400
+    assert "not valid UTF-8" in response.json()["detail"]
+    emails = session.exec(select(User.email)).all()
+    assert emails == [admin.email]
+
+
+def test_duplicates_within_the_file_and_against_existing_users(
+    client, session, make_user, auth_headers, monkeypatch
+):
+    # The file's duplicates straddle a batch boundary
+    monkeypatch.setattr(users, "BULK_IMPORT_BATCH_SIZE", 2)
+    admin = make_user(UserType.admin)
+    existing = make_user()
+    content = (
+        HEADER
+        + "First,first@example.com,Passw0rd!,+8801700000001,patient\n"
+        + "Same Email,first@example.com,Passw0rd!,+8801700000002,patient\n"
+        + "Same Mobile,third@example.com,Passw0rd!,+8801700000001,patient\n"
+        + f"Taken Email,{existing.email},Passw0rd!,+8801700000004,patient\n"
+        + f"Taken Mobile,fifth@example.com,Passw0rd!,{existing.mobile},patient\n"
+    ).encode()
+
+    response = upload(client, auth_headers(admin), content)
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["total"], report["created"]) == (5, 1)
+    assert [(e["row"], e["errors"]) for e in report["errors"]] == [
+        (2, ["Email already registered"]),
+        (3, ["Mobile number already registered"]),
+        (4, ["Email already registered"]),
+        (5, ["Mobile number already registered"]),
+    ]
+    assert session.exec(
+        select(User.full_name).where(User.mobile == "+8801700000001")
+    ).all() == ["First"]
+
+
+def test_doctor_rows_need_the_doctor_fields(client, make_user, auth_headers):
+    admin = make_user(UserType.admin)
+    content = (
+        "full_name,email,password,mobile,user_type,license_number,experience_years\n"
+        + "Dr Partial,partial@example.com,Passw0rd!,+8801700000001,doctor,LIC-1,5\n"
+    ).encode()
+
+    response = upload(client, auth_headers(admin), content)
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["created"] == 0
+    assert report["errors"][0]["errors"] == [
+        "consultation_fee is required for doctors",
+        "available_timeslots is required for doctors",
+    ]
+
+
+def test_admin_rows_are_rejected(client, session, make_user, auth_headers):
+    admin = make_user(UserType.admin)
+    content = (
+        HEADER + "New Admin,root@example.com,Passw0rd!,+8801700000001,admin\n"
+    ).encode()
+
+    response = upload(client, auth_headers(admin), content)
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["created"] == 0
+    assert report["errors"][0]["errors"] == [
+        "Bulk import only creates doctor and patient accounts"
+    ]
+    assert (
+        session.exec(select(User).where(User.email == "root@example.com")).all() == []
+    )
+
+
+def test_jsonl_import(client, session, make_user, auth_headers):
+    admin = make_user(UserType.admin)
+    doctor = {
+        "full_name": "Dr Json",
+        "email": "doctor@example.com",
+        "password": "Passw0rd!",
+        "mobile": "+8801700000001",
+        "user_type": "doctor",
+        "license_number": "LIC-1",
+        "experience_years": 5,
+        "consultation_fee": 500,
+        "available_timeslots": "09:00-12:00",
+    }
+    lines = [
+        json.dumps(doctor),
+        "",
+        "{not json",
+        json.dumps(["a", "list"]),
+        json.dumps(
+            {
+                "full_name": "Json Patient",
+                "email": "patient@example.com",
+                "password": "Passw0rd!",
+                "mobile": "+8801700000002",
+                "user_type": "patient",
+            }
+        ),
+    ]
+    content = "\n".join(lines).encode()
+
+    response = upload(client, auth_headers(admin), content, filename="users.jsonl")
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    # The blank line is skipped and not numbered
+    assert (report["total"], report["created"]) == (4, 2)
+    assert [(e["row"], e["errors"]) for e in report["errors"]] == [
+        (2, ["Row is not a valid JSON object"]),
+        (3, ["Row is not a valid JSON object"]),
+    ]
+    created = session.exec(
+        select(User).where(
+            User.email.in_(["doctor@example.com", "patient@example.com"])
+        )
+    ).all()
+    assert {user.user_type for user in created} == {UserType.doctor, UserType.patient}
+    assert all(auth.verify_password("Passw0rd!", u.hashed_password) for u in created)
+
+
+def test_concurrent_imports_share_one_hash_pool(monkeypatch):
+    created = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            created.append(self)
+
+        def map(self, fn, items, chunksize):
+            return [f"hashed-{item}" for item in items]
+
+        def shutdown(self):
+            pass
+
+    monkeypatch.setattr(auth, "ProcessPoolExecutor", SlowPool)
+    monkeypatch.setattr(auth, "PASSWORD_HASH_WORKERS", 2)
+    monkeypatch.setattr(auth, "_hash_pool", None)
+
+    threads = [
+        threading.Thread(target=auth.get_password_hashes, args=(["a", "b"],))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    auth.shutdown_hash_pool()
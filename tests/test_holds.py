@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app.crud import appointment as appointment_crud
+from sqlmodel import select
+from app.models.appointment import Appointment, AppointmentCreate, SlotHold
+from app.models.user import User, UserType
+from app.utils.holds import DatabaseHoldBackend, HoldBackend, InMemoryHoldBackend
+
+SLOT = (datetime.now() + timedelta(days=7)).replace(
+    hour=10, minute=0, second=0, microsecond=0
+)
+
+
+@pytest.fixture
+def hold_backend(monkeypatch):
+    backend = InMemoryHoldBackend()
+    monkeypatch.setattr(appointment_crud, "hold_backend", backend)
+    return backend
+
+
+def hold(client, doctor, headers):
+    return client.post(
+        "/api/appointments/holds",
+        json={"doctor_id": doctor.id, "appointment_date": SLOT.isoformat()},
+        headers=headers,
+    )
+
+
+def test_hold_backend_is_abstract():
+    with pytest.raises(TypeError):
+        HoldBackend()
+
+
+def test_competing_hold_gets_conflict(client, make_user, auth_headers, hold_backend):
+    doctor = make_user(UserType.doctor)
+    first, second = make_user(), make_user()
+
+    assert hold(client, doctor, auth_headers(first)).status_code == 200
+    response = hold(client, doctor, auth_headers(second))
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == (
+        "This timeslot is currently held by another patient"
+    )
+
+
+def test_failed_booking_restores_memory_hold(
+    session, make_user, hold_backend, monkeypatch
+):
+    doctor = make_user(UserType.doctor)
+    patient, other = make_user(), make_user()
+    held = hold_backend.acquire(session, doctor.id, patient.id, SLOT)
+    appointment = AppointmentCreate(
+        doctor_id=doctor.id, patient_id=patient.id, appointment_date=SLOT
+    )
+
+    def failing_record_booking(session, db_appointment):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as m:
+        m.setattr(appointment_crud, "record_booking", failing_record_booking)
+        with pytest.raises(RuntimeError):
+            appointment_crud.create_appointment(
+                session, appointment, patient.id, hold_id=held.id
+            )
+    session.rollback()
+
+    # Still held against other patients, and still usable by its owner
+    assert hold_backend.is_held(session, doctor.id, SLOT, other.id)
+    booked = appointment_crud.create_appointment(
+        session, appointment, patient.id, hold_id=held.id
+    )
+    assert booked.id is not None
+    assert not hold_backend.is_held(session, doctor.id, SLOT, other.id)
+
+
+def test_hold_is_consumed_once(session, make_user, hold_backend):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    held = hold_backend.acquire(session, doctor.id, patient.id, SLOT)
+    appointment = AppointmentCreate(
+        doctor_id=doctor.id, patient_id=patient.id, appointment_date=SLOT
+    )
+
+    appointment_crud.create_appointment(
+        session, appointment, patient.id, hold_id=held.id
+    )
+    later = appointment.model_copy(
+        update={"appointment_date": SLOT + timedelta(hours=2)}
+    )
+    with pytest.raises(HTTPException) as exc:
+        appointment_crud.create_appointment(session, later, patient.id, hold_id=held.id)
+    assert exc.value.status_code == 409
+
+
+@pytest.fixture
+def database_holds(monkeypatch):
+    backend = DatabaseHoldBackend()
+    monkeypatch.setattr(appointment_crud, "hold_backend", backend)
+    return backend
+
+
+def test_database_hold_conflict(
+    client, session, make_user, auth_headers, database_holds
+):
+    doctor = make_user(UserType.doctor)
+    first, second = make_user(), make_user()
+
+    assert hold(client, doctor, auth_headers(first)).status_code == 200
+    response = hold(client, doctor, auth_headers(second))
+
+    assert response.status_code == 409
+    assert database_holds.is_held(session, doctor.id, SLOT, second.id)
+    assert not database_holds.is_held(session, doctor.id, SLOT, first.id)
+
+
+def test_database_conflict_leaves_the_callers_transaction(
+    session, make_user, database_holds
+):
+    doctor = make_user(UserType.doctor)
+    first, second = make_user(), make_user()
+    database_holds.acquire(session, doctor.id, first.id, SLOT)
+
+    first.full_name = "Renamed Before Hold"
+    session.add(first)
+    assert database_holds.acquire(session, doctor.id, second.id, SLOT) is None
+    session.commit()
+
+    session.expire_all()
+    assert session.get(User, first.id).full_name == "Renamed Before Hold"
+
+
+def test_database_rehold_replaces_the_earlier_hold(session, make_user, database_holds):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    earlier = database_holds.acquire(session, doctor.id, patient.id, SLOT)
+    later = database_holds.acquire(
+        session, doctor.id, patient.id, SLOT + timedelta(minutes=15)
+    )
+
+    assert session.exec(select(SlotHold.id)).all() == [later.id]
+    assert earlier.id != later.id
+
+
+def test_database_hold_is_consumed_by_the_booking(session, make_user, database_holds):
+    doctor = make_user(UserType.doctor)
+    patient, other = make_user(), make_user()
+    held = database_holds.acquire(session, doctor.id, patient.id, SLOT)
+    appointment = AppointmentCreate(
+        doctor_id=doctor.id, patient_id=patient.id, appointment_date=SLOT
+    )
+
+    booked = appointment_crud.create_appointment(
+        session, appointment, patient.id, hold_id=held.id
+    )
+
+    assert session.exec(select(SlotHold)).all() == []
+    assert session.get(Appointment, booked.id) is not None
+    # The slot is now blocked by the appointment rather than the hold
+    assert not database_holds.is_held(session, doctor.id, SLOT, other.id)
+
+
+def test_failed_booking_keeps_database_hold(
+    session, make_user, database_holds, monkeypatch
+):
+    doctor = make_user(UserType.doctor)
+    patient, other = make_user(), make_user()
+    held = database_holds.acquire(session, doctor.id, patient.id, SLOT)
+    appointment = AppointmentCreate(
+        doctor_id=doctor.id, patient_id=patient.id, appointment_date=SLOT
+    )
+
+    def failing_record_booking(session, db_appointment):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as m:
+        m.setattr(appointment_crud, "record_booking", failing_record_booking)
+        with pytest.raises(RuntimeError):
+            appointment_crud.create_appointment(
+                session, appointment, patient.id, hold_id=held.id
+            )
+    session.rollback()
+
+    # The DELETE of the hold rolled back with the appointment INSERT
+    assert session.exec(select(Appointment)).all() == []
+    assert session.exec(select(SlotHold.id)).all() == [held.id]
+    assert database_holds.is_held(session, doctor.id, SLOT, other.id)
+    booked = appointment_crud.create_appointment(
+        session, appointment, patient.id, hold_id=held.id
+    )
+    assert booked.id is not None
+
+
+def test_database_purge_expired(session, make_user, database_holds):
+    doctor = make_user(UserType.doctor)
+    patient, other = make_user(), make_user()
+    active = database_holds.acquire(session, doctor.id, patient.id, SLOT)
+    session.add(
+        SlotHold(
+            id="expired",
+            doctor_id=doctor.id,
+            patient_id=other.id,
+            appointment_date=SLOT + timedelta(hours=3),
+            expires_at=datetime.now() - timedelta(seconds=1),
+        )
+    )
+    session.commit()
+
+    assert database_holds.purge_expired(session) == 1
+    assert session.exec(select(SlotHold.id)).all() == [active.id]
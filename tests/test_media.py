@@ -0,0 +1,150 @@
+import os
+import time
+import pytest
+from app.models.user import User, UserType
+from app.utils import media
+from app.utils.media import (
+    collect_orphaned_images,
+    delete_profile_image,
+    migrate_flat_images,
+)
+
+HOUR = 3600
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    directory = str(tmp_path / "media" / "profile_images")
+    monkeypatch.setattr(media, "PROFILE_IMAGE_DIR", directory)
+    return directory
+
+
+def write_image(path: str, size: int = 10, age: float = 2 * HOUR) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def sharded_image(name: str, **kwargs) -> str:
+    return write_image(media._sharded_path(name), **kwargs)
+
+
+def set_profile_image(session, user, path):
+    user.profile_image = path
+    session.add(user)
+    session.commit()
+
+
+def test_orphan_is_deleted_and_referenced_file_kept(session, make_user):
+    orphan = sharded_image("aaaa1111.jpg", size=100)
+    kept = sharded_image("bbbb2222.jpg", size=30)
+    set_profile_image(session, make_user(), kept)
+
+    report = collect_orphaned_images(session, grace_seconds=HOUR)
+
+    assert not os.path.exists(orphan)
+    assert os.path.exists(kept)
+    assert report == {
+        "scanned": 2,
+        "deleted": 1,
+        "reclaimed_bytes": 100,
+        "retained_bytes": 30,
+    }
+
+
+def test_files_inside_the_grace_period_are_kept(session):
+    fresh = sharded_image("cccc3333.jpg", size=40, age=60)
+
+    report = collect_orphaned_images(session, grace_seconds=HOUR)
+
+    assert os.path.exists(fresh)
+    assert (report["deleted"], report["retained_bytes"]) == (0, 40)
+
+
+def test_bytes_are_reported_across_batches(session, make_user):
+    orphans = [sharded_image(f"dd{i:02d}eeee.jpg", size=10 + i) for i in range(3)]
+    kept = [sharded_image(f"ff{i:02d}aaaa.jpg", size=100 + i) for i in range(2)]
+    fresh = sharded_image("ffffffff.jpg", size=1000, age=0)
+    for path in kept:
+        set_profile_image(session, make_user(), path)
+
+    report = collect_orphaned_images(session, grace_seconds=HOUR, batch_size=2)
+
+    assert report == {
+        "scanned": 6,
+        "deleted": 3,
+        "reclaimed_bytes": 10 + 11 + 12,
+        "retained_bytes": 100 + 101 + 1000,
+    }
+    assert not any(os.path.exists(path) for path in orphans)
+    assert all(os.path.exists(path) for path in kept + [fresh])
+
+
+def test_stored_paths_are_compared_normalized(
+    session, make_user, tmp_path, monkeypatch
+):
+    # The store is configured relative to the working directory, but the row
+    # was written while it was configured as an absolute path
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(media, "PROFILE_IMAGE_DIR", os.path.join("media", "images"))
+    path = sharded_image("abcd4444.jpg")
+    set_profile_image(session, make_user(), os.path.abspath(path))
+
+    report = collect_orphaned_images(session, grace_seconds=HOUR)
+
+    assert report["deleted"] == 0
+    assert os.path.exists(path)
+
+
+def test_paths_outside_the_store_are_never_deleted(store, tmp_path):
+    outside = write_image(str(tmp_path / "outside.jpg"))
+    escaping = os.path.join(store, "..", "..", "outside.jpg")
+
+    delete_profile_image(str(outside))
+    delete_profile_image(escaping)
+
+    assert os.path.exists(outside)
+
+
+def test_admin_update_removes_previous_image(
+    client, session, make_user, auth_headers, store
+):
+    admin = make_user(UserType.admin)
+    patient = make_user()
+    previous = sharded_image("eeee5555.jpg")
+    set_profile_image(session, patient, previous)
+
+    response = client.patch(
+        f"/api/users/{patient.id}",
+        files={"profile_image": ("new.png", b"\x89PNG fake", "image/png")},
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200, response.text
+    new_path = response.json()["profile_image"]
+    assert new_path != previous
+    assert os.path.exists(new_path)
+    assert os.path.commonpath([store, new_path]) == store
+    assert not os.path.exists(previous)
+
+
+def test_migrate_flat_images_moves_files_and_rows(session, make_user, store):
+    flat = write_image(os.path.join(store, "abcdef01.jpg"), size=7)
+    sharded = sharded_image("12345678.jpg")
+    missing = os.path.join(store, "99999999.jpg")
+    users = [make_user() for _ in range(3)]
+    for user, path in zip(users, [flat, sharded, missing]):
+        set_profile_image(session, user, path)
+
+    report = migrate_flat_images(session, batch_size=2)
+
+    assert report == {"moved": 1, "missing": 1}
+    session.expire_all()
+    moved_to = session.get(User, users[0].id).profile_image
+    assert moved_to == media._sharded_path("abcdef01.jpg")
+    assert os.path.getsize(moved_to) == 7
+    assert not os.path.exists(flat)
+    assert session.get(User, users[1].id).profile_image == sharded
@@ -0,0 +1,338 @@
+"""Guard the SQL shape of every route and of the hot queries.
+
+Each route gets an upper bound on the statements one request may issue;
+raise a budget only together with the change that needs it. The hot
+queries must keep using an index (on Postgres, run with TEST_DATABASE_URL).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+import pytest
+from sqlmodel import Session
+from app.crud.appointment import (
+    get_appointments_for_user,
+    has_overlapping_appointment,
+)
+from app.crud.user import get_user_by_email
+from app.database import engine
+from app.main import app
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import User, UserType
+from tests.conftest import PASSWORD
+
+DOCTORS = 10
+PATIENTS = 50
+APPOINTMENTS_PER_PATIENT = 10
+SLOT = (datetime.now() + timedelta(days=30)).replace(
+    hour=10, minute=0, second=0, microsecond=0
+)
+
+
+@dataclass
+class Seeded:
+    doctor: User
+    patient: User
+    admin: User
+    appointment: Appointment
+    headers: Callable[[User], dict]
+
+
+@pytest.fixture
+def seeded(session, make_user, auth_headers) -> Seeded:
+    doctors = [make_user(UserType.doctor) for _ in range(DOCTORS)]
+    patients = [make_user() for _ in range(PATIENTS)]
+    admin = make_user(UserType.admin)
+
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    appointments = [
+        Appointment(
+            doctor_id=doctors[(p + i) % DOCTORS].id,
+            patient_id=patient.id,
+            appointment_date=start + timedelta(days=i - 5, hours=p % 8),
+            status=list(AppointmentStatus)[(p + i) % 4],
+        )
+        for p, patient in enumerate(patients)
+        for i in range(APPOINTMENTS_PER_PATIENT)
+    ]
+    session.add_all(appointments)
+    # One open appointment of doctors[0] and patients[0] for status changes
+    pending = Appointment(
+        doctor_id=doctors[0].id,
+        patient_id=patients[0].id,
+        appointment_date=SLOT + timedelta(days=1),
+    )
+    session.add(pending)
+    session.commit()
+    return Seeded(doctors[0], patients[0], admin, pending, auth_headers)
+
+
+def hold(client, s: Seeded):
+    return client.post(
+        "/api/appointments/holds",
+        json={"doctor_id": s.doctor.id, "appointment_date": SLOT.isoformat()},
+        headers=s.headers(s.patient),
+    )
+
+
+def book(client, s: Seeded, hold_id: str | None = None):
+    return client.post(
+        "/api/appointments/book",
+        json={
+            "doctor_id": s.doctor.id,
+            "appointment_date": SLOT.isoformat(),
+            "hold_id": hold_id,
+        },
+        headers=s.headers(s.patient),
+    )
+
+
+def change_status(client, s: Seeded, user: User, new_status: str):
+    return client.patch(
+        f"/api/appointments/{s.appointment.id}/status",
+        params={"new_status": new_status},
+        headers=s.headers(user),
+    )
+
+
+def register(client, s):
+    data = {
+        "full_name": "New Patient",
+        "email": "new@example.com",
+        "password": PASSWORD,
+        "mobile": "+8801999999999",
+        "user_type": "patient",
+    }
+    return lambda: client.post("/api/users/register", data=data)
+
+
+def bulk_import(client, s):
+    content = (
+        "full_name,email,password,mobile,user_type\n"
+        f"Imported One,imported1@example.com,{PASSWORD},+8801999999991,patient\n"
+        f"Imported Two,imported2@example.com,{PASSWORD},+8801999999992,patient\n"
+    ).encode()
+    return lambda: client.post(
+        "/api/users/bulk-import",
+        files={"file": ("users.csv", content, "text/csv")},
+        headers=s.headers(s.admin),
+    )
+
+
+def login(client, s):
+    data = {"username": s.patient.email, "password": PASSWORD}
+    return lambda: client.post("/api/users/login", data=data)
+
+
+def get(path: str, user: Callable[[Seeded], User | None] = lambda s: None):
+    def setup(client, s):
+        headers = s.headers(user(s)) if user(s) else {}
+        return lambda: client.get(path.format(s=s), headers=headers)
+
+    return setup
+
+
+def update_own_profile(client, s):
+    headers = s.headers(s.patient)
+    return lambda: client.patch(
+        "/api/users/me", data={"full_name": "Renamed"}, headers=headers
+    )
+
+
+def admin_update_user(client, s):
+    headers = s.headers(s.admin)
+    return lambda: client.patch(
+        f"/api/users/{s.patient.id}",
+        data={"full_name": "Renamed", "mobile": "+8801888888888"},
+        headers=headers,
+    )
+
+
+def change_password(client, s):
+    headers = s.headers(s.patient)
+    data = {"current_password": PASSWORD, "new_password": f"{PASSWORD}2"}
+    return lambda: client.post(
+        "/api/users/me/change-password", data=data, headers=headers
+    )
+
+
+def hold_slot(client, s):
+    return lambda: hold(client, s)
+
+
+def release_hold(client, s):
+    hold_id = hold(client, s).json()["id"]
+    headers = s.headers(s.patient)
+    return lambda: client.delete(f"/api/appointments/holds/{hold_id}", headers=headers)
+
+
+def book_slot(client, s):
+    return lambda: book(client, s)
+
+
+def book_with_hold(client, s):
+    hold_id = hold(client, s).json()["id"]
+    return lambda: book(client, s, hold_id)
+
+
+def patient_cancels(client, s):
+    return lambda: change_status(client, s, s.patient, "cancelled")
+
+
+def doctor_confirms(client, s):
+    return lambda: change_status(client, s, s.doctor, "confirmed")
+
+
+def admin_reopens(client, s):
+    assert change_status(client, s, s.patient, "cancelled").is_success
+    return lambda: change_status(client, s, s.admin, "confirmed")
+
+
+# Name -> (route, statement budget, setup returning the request to count)
+ROUTES = {
+    "register": ("POST /api/users/register", 3, register),
+    "bulk import": ("POST /api/users/bulk-import", 3, bulk_import),
+    "login": ("POST /api/users/login", 1, login),
+    "me": ("GET /api/users/me", 1, get("/api/users/me", lambda s: s.patient)),
+    "admin dashboard": (
+        "GET /api/users/admin-dashboard",
+        1,
+        get("/api/users/admin-dashboard", lambda s: s.admin),
+    ),
+    "doctor dashboard": (
+        "GET /api/users/doctor-dashboard",
+        1,
+        get("/api/users/doctor-dashboard", lambda s: s.doctor),
+    ),
+    "update own profile": ("PATCH /api/users/me", 2, update_own_profile),
+    "admin updates user": ("PATCH /api/users/{user_id}", 3, admin_update_user),
+    "change password": ("POST /api/users/me/change-password", 2, change_password),
+    "availability": (
+        "GET /api/appointments/doctor/{doctor_id}/availability",
+        2,
+        get(
+            "/api/appointments/doctor/{s.doctor.id}/availability"
+            f"?date={SLOT.isoformat()}"
+        ),
+    ),
+    "hold slot": ("POST /api/appointments/holds", 3, hold_slot),
+    "release hold": ("DELETE /api/appointments/holds/{hold_id}", 1, release_hold),
+    "book": ("POST /api/appointments/book", 5, book_slot),
+    "book with hold": ("POST /api/appointments/book", 5, book_with_hold),
+    "patient cancels": (
+        "PATCH /api/appointments/{appointment_id}/status",
+        3,
+        patient_cancels,
+    ),
+    "doctor confirms": (
+        "PATCH /api/appointments/{appointment_id}/status",
+        2,
+        doctor_confirms,
+    ),
+    "admin reopens": (
+        "PATCH /api/appointments/{appointment_id}/status",
+        5,
+        admin_reopens,
+    ),
+    "my appointments (patient)": (
+        "GET /api/appointments/my-appointments",
+        3,
+        get("/api/appointments/my-appointments", lambda s: s.patient),
+    ),
+    "my appointments (doctor)": (
+        "GET /api/appointments/my-appointments",
+        3,
+        get("/api/appointments/my-appointments", lambda s: s.doctor),
+    ),
+    "utilization": (
+        "GET /api/analytics/utilization",
+        3,
+        get("/api/analytics/utilization", lambda s: s.admin),
+    ),
+    "audit queue": (
+        "GET /api/analytics/audit-queue",
+        1,
+        get("/api/analytics/audit-queue", lambda s: s.admin),
+    ),
+}
+
+
+def test_every_route_has_a_budget():
+    api_routes = {
+        f"{method} {route.path}"
+        for route in app.routes
+        for method in getattr(route, "methods", ())
+        if route.path.startswith("/api/")
+    }
+    assert api_routes == {route for route, _, _ in ROUTES.values()}
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_route_query_budget(route, client, seeded, count_queries):
+    _, budget, setup = ROUTES[route]
+    request = setup(client, seeded)
+
+    with count_queries() as statements:
+        response = request()
+
+    assert response.is_success, response.text
+    sql = "\n".join(" ".join(statement.split()) for statement in statements)
+    assert len(statements) <= budget, f"{route}: {len(statements)} statements\n{sql}"
+
+
+def explain(statement: str, parameters) -> list[str]:
+    with engine.connect() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            if engine.dialect.name == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return [row[-1] for row in cursor.fetchall()]
+            # Tiny seeded tables make a seq scan cheapest; ask whether an
+            # index is usable at all.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {statement}", parameters)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.rollback()
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    if engine.dialect.name == "sqlite":
+        return [
+            line
+            for line in plan
+            if line.startswith("SCAN ") and "USING" not in line.split(" ", 2)[-1]
+        ]
+    return [line.strip() for line in plan if "Seq Scan" in line]
+
+
+HOT_QUERIES = {
+    "has_overlapping_appointment": lambda session, s: has_overlapping_appointment(
+        session, s.doctor.id, SLOT, s.patient.id
+    ),
+    "get_appointments_for_user (patient)": lambda session, s: (
+        get_appointments_for_user(session, s.patient.id, UserType.patient)
+    ),
+    "get_appointments_for_user (doctor, range)": lambda session, s: (
+        get_appointments_for_user(
+            session,
+            s.doctor.id,
+            UserType.doctor,
+            datetime.now() - timedelta(days=3),
+            datetime.now() + timedelta(days=3),
+        )
+    ),
+    "get_user_by_email": lambda session, s: get_user_by_email(session, s.patient.email),
+}
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES)
+def test_hot_query_uses_index(query, seeded, count_queries):
+    with Session(engine) as session, count_queries(parameters=True) as statements:
+        HOT_QUERIES[query](session, seeded)
+
+    assert statements
+    plans = [explain(statement, parameters) for statement, parameters in statements]
+    scans = [line for plan in plans for line in full_scans(plan)]
+    assert not scans, f"{query} scans without an index: {plans}"
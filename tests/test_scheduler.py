@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from app.database import engine
+from app.utils.scheduler import LeaderLock, Scheduler
+
+
+def test_non_postgres_process_is_always_leader():
+    lock = LeaderLock(engine)
+    assert engine.dialect.name != "postgresql"
+    assert lock.acquire()
+    assert lock.acquire()
+    lock.release()
+    assert lock._conn is None
+
+
+def test_run_job_records_result_and_duration():
+    scheduler = Scheduler(engine)
+    scheduler.add_job("ok", lambda: {"swept": 3}, interval=60)
+
+    result = scheduler.run_job(scheduler.jobs[0])
+
+    assert result["swept"] == 3
+    assert "duration_seconds" in result
+    assert scheduler.jobs[0].last_result is result
+
+
+def test_run_job_survives_failures():
+    def broken():
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler(engine)
+    scheduler.add_job("broken", broken, interval=60)
+
+    assert scheduler.run_job(scheduler.jobs[0])["error"] is True
+
+
+def test_scheduler_runs_due_jobs_until_stopped():
+    ran = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        ran.set()
+        return {}
+
+    scheduler = Scheduler(engine, tick_seconds=0.01)
+    scheduler.add_job("job", job, interval=0.01)
+    scheduler.add_job("later", lambda: calls.append("later") or {}, interval=3600)
+    scheduler.start()
+    try:
+        assert ran.wait(5)
+    finally:
+        scheduler.stop()
+
+    assert "later" not in calls
+    count = len(calls)
+    ran.clear()
+    assert not ran.wait(0.1)
+    assert len(calls) == count
+
+
+class RecordingLock:
+    def __init__(self):
+        self.released_by: list[threading.Thread] = []
+
+    def acquire(self) -> bool:
+        return True
+
+    def release(self):
+        self.released_by.append(threading.current_thread())
+
+
+def test_stop_leaves_lock_to_a_job_still_running():
+    started, finish = threading.Event(), threading.Event()
+
+    def long_job():
+        started.set()
+        finish.wait(5)
+        return {}
+
+    scheduler = Scheduler(engine, tick_seconds=0.01)
+    scheduler.lock = lock = RecordingLock()
+    scheduler.add_job("long", long_job, interval=0.01)
+    scheduler.start()
+    assert started.wait(5)
+    thread = scheduler._thread
+
+    scheduler.stop(timeout=0.05)
+    assert thread.is_alive()
+    assert lock.released_by == []
+
+    finish.set()
+    thread.join(5)
+    assert lock.released_by == [thread]
+
+
+def test_lifespan_shutdown_runs_off_the_event_loop(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    loops = []
+    shutdown = main._shutdown
+
+    def recording_shutdown(scheduler):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        shutdown(scheduler)
+
+    monkeypatch.setattr(main, "_shutdown", recording_shutdown)
+    with TestClient(main.app):
+        pass
+
+    assert loops == [None]
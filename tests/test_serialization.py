@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.crud.appointment import archive_appointments, get_appointments_for_user
+from app.models.appointment import Appointment, AppointmentRead, AppointmentStatus
+from app.models.user import UserType
+
+SLOT = (datetime.now() + timedelta(days=3)).replace(
+    hour=10, minute=0, second=0, microsecond=0
+)
+
+
+def response_model_body(type_, content) -> bytes:
+    # What FastAPI would send for response_model=type_ without the fast path
+    field = create_model_field(name="Response", type_=type_, mode="serialization")
+    encoded = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(encoded).body
+
+
+def test_book_and_status_bodies_match_response_model(
+    client, session, make_user, auth_headers
+):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+
+    response = client.post(
+        "/api/appointments/book",
+        json={
+            "doctor_id": doctor.id,
+            "appointment_date": SLOT.isoformat(),
+            "notes": "Fièvre et maux de tête — 2 jours",
+        },
+        headers=auth_headers(patient),
+    )
+    assert response.status_code == 200, response.text
+    appointment = session.get(Appointment, response.json()["id"])
+    assert response.content == response_model_body(AppointmentRead, appointment)
+
+    response = client.patch(
+        f"/api/appointments/{appointment.id}/status",
+        params={"new_status": "confirmed"},
+        headers=auth_headers(doctor),
+    )
+    assert response.status_code == 200, response.text
+    session.refresh(appointment)
+    assert response.content == response_model_body(AppointmentRead, appointment)
+
+
+def test_my_appointments_body_matches_response_model_with_archive(
+    client, session, make_user, auth_headers
+):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    old = datetime.now() - timedelta(days=500)
+    session.add_all(
+        [
+            Appointment(
+                doctor_id=doctor.id,
+                patient_id=patient.id,
+                appointment_date=old,
+                notes="Archivé",
+                status=AppointmentStatus.completed,
+            ),
+            Appointment(
+                doctor_id=doctor.id,
+                patient_id=patient.id,
+                appointment_date=SLOT,
+                status=AppointmentStatus.pending,
+            ),
+        ]
+    )
+    session.commit()
+    assert archive_appointments(session, datetime.now() - timedelta(days=365)) == 1
+
+    for user in (patient, doctor):
+        rows = get_appointments_for_user(session, user.id, user.user_type)
+        # Archived rows come back from the archive with string datetimes
+        assert any(isinstance(row["appointment_date"], str) for row in rows)
+
+        response = client.get(
+            "/api/appointments/my-appointments", headers=auth_headers(user)
+        )
+        assert response.status_code == 200, response.text
+        assert len(response.json()) == 2
+        assert response.content == response_model_body(List[AppointmentRead], rows)
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from app.crud.appointment import (
+    complete_past_appointments,
+    expire_pending_appointments,
+)
+from app.models.analytics import DoctorDailyStats
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import UserType
+from app.utils.audit import audit_writer
+
+NOW = datetime(2025, 6, 1, 12, 0)
+TTL = timedelta(hours=24)
+
+
+def add_appointment(session, doctor, patient, appointment_date, status, **fields):
+    appointment = Appointment(
+        doctor_id=doctor.id,
+        patient_id=patient.id,
+        appointment_date=appointment_date,
+        status=status,
+        **fields,
+    )
+    session.add(appointment)
+    session.commit()
+    return appointment
+
+
+def statuses(session) -> dict[int, AppointmentStatus]:
+    session.expire_all()
+    return dict(session.exec(select(Appointment.id, Appointment.status)).all())
+
+
+def test_complete_past_appointments_in_batches(session, make_user, count_queries):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    past = [
+        add_appointment(
+            session,
+            doctor,
+            patient,
+            NOW - timedelta(days=1, hours=i),
+            AppointmentStatus.confirmed,
+        )
+        for i in range(5)
+    ]
+    future = add_appointment(
+        session, doctor, patient, NOW + timedelta(days=1), AppointmentStatus.confirmed
+    )
+
+    with count_queries() as statements:
+        assert complete_past_appointments(session, NOW, batch_size=2) == 5
+
+    # 2 + 2 + 1: the short last batch ends the sweep without another SELECT
+    updates = [s for s in statements if s.startswith("UPDATE appointment")]
+    assert len(updates) == 3
+    result = statuses(session)
+    assert all(result[a.id] == AppointmentStatus.completed for a in past)
+    assert result[future.id] == AppointmentStatus.confirmed
+
+    stats = session.exec(select(DoctorDailyStats)).all()
+    assert sum(row.completed for row in stats) == 5
+
+
+def test_sweep_with_exact_multiple_of_batch_size(session, make_user):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    for i in range(4):
+        add_appointment(
+            session,
+            doctor,
+            patient,
+            NOW - timedelta(hours=i + 1),
+            AppointmentStatus.confirmed,
+        )
+
+    assert complete_past_appointments(session, NOW, batch_size=2) == 4
+    assert complete_past_appointments(session, NOW, batch_size=2) == 0
+
+
+def test_expire_pending_appointments(session, make_user):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    tomorrow = NOW + timedelta(days=1)
+    stale = add_appointment(
+        session,
+        doctor,
+        patient,
+        tomorrow,
+        AppointmentStatus.pending,
+        created_at=NOW - TTL - timedelta(minutes=1),
+    )
+    fresh = add_appointment(
+        session,
+        doctor,
+        patient,
+        tomorrow + timedelta(hours=1),
+        AppointmentStatus.pending,
+        created_at=NOW - timedelta(hours=1),
+    )
+    missed = add_appointment(
+        session,
+        doctor,
+        patient,
+        NOW - timedelta(hours=1),
+        AppointmentStatus.pending,
+        created_at=NOW - timedelta(hours=2),
+    )
+    confirmed = add_appointment(
+        session,
+        doctor,
+        patient,
+        tomorrow + timedelta(hours=2),
+        AppointmentStatus.confirmed,
+        created_at=NOW - TTL * 3,
+    )
+
+    assert expire_pending_appointments(session, NOW, TTL, batch_size=1) == 2
+
+    result = statuses(session)
+    assert result[stale.id] == AppointmentStatus.cancelled
+    assert result[missed.id] == AppointmentStatus.cancelled
+    assert result[fresh.id] == AppointmentStatus.pending
+    assert result[confirmed.id] == AppointmentStatus.confirmed
+
+    stats = session.exec(select(DoctorDailyStats)).all()
+    assert sum(row.cancelled for row in stats) == 2
+
+
+def test_sweeps_record_system_audit_events(session, make_user, monkeypatch):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    confirmed = add_appointment(
+        session, doctor, patient, NOW - timedelta(days=1), AppointmentStatus.confirmed
+    )
+    pending = add_appointment(
+        session, doctor, patient, NOW - timedelta(hours=1), AppointmentStatus.pending
+    )
+    events = []
+    monkeypatch.setattr(
+        audit_writer, "record", lambda *args, **kwargs: events.append((args, kwargs))
+    )
+
+    assert complete_past_appointments(session, NOW, batch_size=1) == 1
+    assert expire_pending_appointments(session, NOW, TTL) == 1
+
+    assert events == [
+        (
+            ("appointment.status_changed", "appointment", confirmed.id),
+            {"changes": {"status": "completed"}},
+        ),
+        (
+            ("appointment.status_changed", "appointment", pending.id),
+            {"changes": {"status": "cancelled"}},
+        ),
+    ]
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from app.models.analytics import DoctorDailyStats
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.user import User, UserType
+
+SLOT = (datetime.now() + timedelta(days=7)).replace(
+    hour=10, minute=0, second=0, microsecond=0
+)
+
+
+def add_appointment(session, doctor, patient, status=AppointmentStatus.pending):
+    appointment = Appointment(
+        doctor_id=doctor.id,
+        patient_id=patient.id,
+        appointment_date=SLOT,
+        status=status,
+    )
+    session.add(appointment)
+    session.commit()
+    return appointment
+
+
+def change_status(client, appointment_id, new_status, headers):
+    return client.patch(
+        f"/api/appointments/{appointment_id}/status",
+        params={"new_status": new_status},
+        headers=headers,
+    )
+
+
+def test_register_queries(client, count_queries):
+    with count_queries() as statements:
+        response = client.post(
+            "/api/users/register",
+            data={
+                "full_name": "New Patient",
+                "email": "new@example.com",
+                "password": "Passw0rd!",
+                "mobile": "+8801999999999",
+                "user_type": "patient",
+            },
+        )
+    assert response.status_code == 200, response.text
+    # email check, mobile check, INSERT ... RETURNING
+    assert len(statements) <= 3
+
+
+def test_book_queries(client, make_user, auth_headers, count_queries):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    headers = auth_headers(patient)
+
+    with count_queries() as statements:
+        response = client.post(
+            "/api/appointments/book",
+            json={"doctor_id": doctor.id, "appointment_date": SLOT.isoformat()},
+            headers=headers,
+        )
+    assert response.status_code == 200, response.text
+    # auth, doctor, overlap check, INSERT ... RETURNING, summary upsert
+    assert len(statements) <= 5
+    # No refresh() SELECT after the INSERT
+    insert_at = next(i for i, s in enumerate(statements) if s.startswith("INSERT"))
+    assert not any(s.startswith("SELECT") for s in statements[insert_at:])
+
+
+def test_update_profile_queries(
+    client, session, make_user, auth_headers, count_queries
+):
+    patient = make_user()
+    admin = make_user(UserType.admin)
+
+    with count_queries() as statements:
+        response = client.patch(
+            "/api/users/me",
+            data={"full_name": "Renamed"},
+            headers=auth_headers(patient),
+        )
+    assert response.status_code == 200, response.text
+    assert response.json()["full_name"] == "Renamed"
+    # auth, UPDATE ... RETURNING
+    assert len(statements) <= 2
+
+    with count_queries() as statements:
+        response = client.patch(
+            f"/api/users/{patient.id}",
+            data={"full_name": "Renamed Again", "mobile": "+8801888888888"},
+            headers=auth_headers(admin),
+        )
+    assert response.status_code == 200, response.text
+    # auth, email/mobile conflict check, UPDATE ... RETURNING
+    assert len(statements) <= 3
+    session.expire_all()
+    assert session.get(User, patient.id).mobile == "+8801888888888"
+
+
+def test_status_change_queries(client, session, make_user, auth_headers, count_queries):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    to_confirm = add_appointment(session, doctor, patient)
+    to_cancel = add_appointment(session, doctor, patient)
+
+    with count_queries() as statements:
+        response = change_status(
+            client, to_confirm.id, "confirmed", auth_headers(doctor)
+        )
+    assert response.status_code == 200, response.text
+    # auth, UPDATE ... RETURNING; the summary does not change
+    assert len(statements) <= 2
+
+    with count_queries() as statements:
+        response = change_status(
+            client, to_cancel.id, "cancelled", auth_headers(patient)
+        )
+    assert response.status_code == 200, response.text
+    # auth, UPDATE ... RETURNING, summary upsert
+    assert len(statements) <= 3
+
+
+def test_admin_can_reopen_closed_appointment(client, session, make_user, auth_headers):
+    doctor = make_user(UserType.doctor)
+    patient = make_user()
+    admin = make_user(UserType.admin)
+    appointment = add_appointment(session, doctor, patient)
+
+    assert change_status(
+        client, appointment.id, "cancelled", auth_headers(patient)
+    ).is_success
+    response = change_status(client, appointment.id, "confirmed", auth_headers(admin))
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "confirmed"
+
+    # The closed -> open change takes the cancellation back out of the summary
+    stats = session.exec(select(DoctorDailyStats)).all()
+    assert sum(row.cancelled for row in stats) == 0
+
+    response = change_status(client, appointment.id, "completed", auth_headers(doctor))
+    assert response.status_code == 200, response.text
+    response = change_status(client, appointment.id, "cancelled", auth_headers(doctor))
+    assert response.status_code == 200, response.text
+    session.expire_all()
+    (row,) = session.exec(select(DoctorDailyStats)).all()
+    assert (row.completed, row.cancelled) == (0, 1)
+
+
+def test_status_change_permissions(client, session, make_user, auth_headers):
+    doctor = make_user(UserType.doctor)
+    other_doctor = make_user(UserType.doctor)
+    patient = make_user()
+    other_patient = make_user()
+    appointment = add_appointment(session, doctor, patient)
+
+    assert (
+        change_status(client, appointment.id, "confirmed", auth_headers(patient))
+    ).status_code == 403
+    assert (
+        change_status(client, appointment.id, "cancelled", auth_headers(other_patient))
+    ).status_code == 403
+    assert (
+        change_status(client, appointment.id, "confirmed", auth_headers(other_doctor))
+    ).status_code == 403
+    assert (
+        change_status(client, 9999, "confirmed", auth_headers(doctor))
+    ).status_code == 404
+
+
+def test_update_user_errors_keep_baseline_order(client, make_user, auth_headers):
+    patient = make_user()
+    other = make_user()
+    admin = make_user(UserType.admin)
+    missing_id = admin.id + 100
+
+    def patch(user_id, headers, **data):
+        return client.patch(f"/api/users/{user_id}", data=data, headers=headers)
+
+    # A missing user wins over a taken email
+    response = patch(missing_id, auth_headers(admin), email=other.email)
+    assert response.status_code == 404
+    response = patch(missing_id, auth_headers(admin), full_name="Nobody")
+    assert response.status_code == 404
+    response = patch(other.id, auth_headers(patient), email=admin.email)
+    assert response.status_code == 403
+    response = patch(patient.id, auth_headers(admin), email=other.email)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+    response = patch(patient.id, auth_headers(admin), mobile=other.mobile)
+    assert response.json()["detail"] == "Mobile number already registered"